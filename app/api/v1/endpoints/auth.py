@@ -1,9 +1,22 @@
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.container import Container
-from app.core.dependencies import get_current_user_with_no_exception
-from app.schema.auth_schema import AuthResponse, Payload, SignIn, SignUp
+from app.core.dependencies import (
+    get_client_ip,
+    get_current_user_with_no_exception,
+    validate_token,
+)
+from app.core.responses import json_response
+from app.schema.auth_schema import (
+    AuthResponse,
+    IntrospectRequest,
+    IntrospectResponse,
+    Payload,
+    SignIn,
+    SignUp,
+)
 from app.schema.user_schema import UserResponse
 from app.services.auth_service import AuthService
 
@@ -15,26 +28,46 @@ router = APIRouter(
 
 @router.post("/sign-in", response_model=AuthResponse)
 @inject
-async def sign_in(user_info: SignIn, service: AuthService = Depends(Provide[Container.auth_service])):
-    return service.sign_in(user_info)
+async def sign_in(
+    user_info: SignIn,
+    background_tasks: BackgroundTasks,
+    client_ip: str | None = Depends(get_client_ip),
+    service: AuthService = Depends(Provide[Container.auth_service]),
+):
+    return json_response(await service.sign_in(user_info, background_tasks, client_ip))
 
 
 @router.post("/sign-up", response_model=UserResponse)
 @inject
 async def sign_up(user_info: SignUp, service: AuthService = Depends(Provide[Container.auth_service])):
-    return service.sign_up(user_info)
+    return await service.sign_up(user_info)
 
 
 @router.delete("/sign-out", response_model=None)
 @inject
-async def sign_out(token: str, service: AuthService = Depends(Provide[Container.auth_service])):
-    return service.sign_out(token)
+async def sign_out(
+    token: str,
+    credentials: HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False)),
+    service: AuthService = Depends(Provide[Container.auth_service]),
+):
+    return await service.sign_out(token, credentials.credentials if credentials else None)
 
 
 @router.get("/refresh-token", response_model=AuthResponse)
 @inject
 async def refresh_token(token: str, service: AuthService = Depends(Provide[Container.auth_service])):
-    return service.refresh_token(token)
+    return json_response(await service.refresh_token(token))
+
+
+@router.post("/introspect", response_model=IntrospectResponse)
+@inject
+async def introspect(
+    request: IntrospectRequest,
+    _: dict = Depends(validate_token),
+    service: AuthService = Depends(Provide[Container.auth_service]),
+):
+    # only callers holding a valid access token may look up other tokens
+    return json_response(await service.introspect(request.tokens))
 
 
 @router.get("/me", response_model=UserResponse | None)
@@ -42,4 +75,4 @@ async def refresh_token(token: str, service: AuthService = Depends(Provide[Conta
 async def get_me(
     me: Payload = Depends(get_current_user_with_no_exception), service: AuthService = Depends(Provide[Container.auth_service])
 ):
-    return service.get_me(me["subject"])
+    return await service.get_me(me["subject"])
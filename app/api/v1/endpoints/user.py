@@ -1,13 +1,24 @@
+from typing import Literal, Optional
+
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 
+from app.core.config import configs
 from app.core.container import Container
 from app.core.dependencies import get_current_super_user
 from app.core.exceptions import AuthError
 from app.core.security import JWTBearer
 from app.schema.base_schema import Blank, FindResult
-from app.schema.user_schema import CreateUser, FindUser, UpdateUser, UserResponse
-from app.services.user_service import UserService
+from app.schema.user_schema import (
+    CreateUser,
+    FindUser,
+    UpdateUser,
+    UserImportReport,
+    UserResponse,
+)
+from app.services.user_service import EXPORT_COLUMNS, RESPONSE_COLUMNS, UserService
+from app.util.bulk_io import MEDIA_TYPES, encode_batches, read_rows
 
 router = APIRouter(prefix="/user", tags=["user"], dependencies=[Depends(JWTBearer())])
 
@@ -16,13 +27,45 @@ router = APIRouter(prefix="/user", tags=["user"], dependencies=[Depends(JWTBeare
 @inject
 async def get_user_list(
     find_query: FindUser = Depends(),
+    stream: Optional[Literal["json", "ndjson"]] = None,
     service: UserService = Depends(Provide[Container.user_service]),
     current_user: UserResponse = Depends(get_current_super_user),
 ):
     if not current_user.is_superuser:
         raise AuthError("Permission denied")
 
-    return service.get_list(find_query)
+    if stream:
+        # every matching row, unpaged, serialized batch by batch straight from the cursor
+        batches = service.stream_list(find_query, EXPORT_COLUMNS, configs.BULK_EXPORT_BATCH_SIZE)
+        return StreamingResponse(encode_batches(batches, stream, EXPORT_COLUMNS), media_type=MEDIA_TYPES[stream])
+    return await service.get_list(find_query, RESPONSE_COLUMNS)
+
+
+@router.post("/import", response_model=UserImportReport)
+@inject
+async def import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    service: UserService = Depends(Provide[Container.user_service]),
+    current_user: UserResponse = Depends(get_current_super_user),
+):
+    if not current_user.is_superuser:
+        raise AuthError("Permission denied")
+    # the body is parsed while it arrives, never buffered whole
+    return await service.import_users(read_rows(request.stream(), format), configs.BULK_IMPORT_CHUNK_SIZE)
+
+
+@router.get("/export")
+@inject
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    service: UserService = Depends(Provide[Container.user_service]),
+    current_user: UserResponse = Depends(get_current_super_user),
+):
+    if not current_user.is_superuser:
+        raise AuthError("Permission denied")
+    batches = service.export_users(configs.BULK_EXPORT_BATCH_SIZE)
+    return StreamingResponse(encode_batches(batches, format, EXPORT_COLUMNS), media_type=MEDIA_TYPES[format])
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -34,7 +77,7 @@ async def get_user(
 ):
     if not current_user.is_superuser:
         raise AuthError("Permission denied")
-    return service.get_by_id(user_id)
+    return await service.get_columns_by_id(user_id, RESPONSE_COLUMNS)
 
 
 @router.post("", response_model=UserResponse)
@@ -46,7 +89,7 @@ async def create_user(
 ):
     if not current_user.is_superuser:
         raise AuthError("Permission denied")
-    return service.add(user)
+    return await service.add(user)
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
@@ -59,7 +102,7 @@ async def update_user(
 ):
     if not current_user.is_superuser:
         raise AuthError("Permission denied")
-    return service.patch(user_id, user)
+    return await service.patch(user_id, user)
 
 
 @router.delete("/{user_id}", response_model=Blank)
@@ -71,5 +114,5 @@ async def delete_user(
 ):
     if not current_user.is_superuser:
         raise AuthError("Permission denied")
-    service.remove_by_id(user_id)
+    await service.remove_by_id(user_id)
     return Blank()
@@ -0,0 +1,21 @@
+import json
+
+from fastapi import APIRouter, Request, Response
+
+from app.core.config import configs
+from app.core.keys import jwks_etag
+from app.core.security import key_ring
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+# the key ring only changes on restart, so the document and its ETag are built once
+_jwks_body = json.dumps(key_ring.jwks(), separators=(",", ":")).encode()
+_jwks_etag = jwks_etag(key_ring.jwks())
+
+
+@router.get("/jwks.json")
+def get_jwks(request: Request):
+    headers = {"Cache-Control": f"public, max-age={configs.JWKS_CACHE_SECONDS}", "ETag": _jwks_etag}
+    if request.headers.get("if-none-match") == _jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=_jwks_body, media_type="application/json", headers=headers)
@@ -0,0 +1,141 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    # bounded LRU cache whose entries also expire after a per-entry ttl
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend:
+    # store shared between processes (redis, memcached, ...); implementations own value serialization
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    # process-local stand-in for a shared store, used by tests and single-process deployments
+    def __init__(self, max_size: int = 100000) -> None:
+        self._cache = TTLCache(max_size=max_size)
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+
+class ModelCache:
+    # snapshots of model rows keyed by id: local LRU in front of an optional shared backend
+    def __init__(self, model, max_size: int, ttl: float, backend: CacheBackend | None = None) -> None:
+        self.model = model
+        self.ttl = ttl
+        self.backend = backend
+        self.local = TTLCache(max_size=max_size, ttl=ttl)
+        self._prefix = f"{model.__name__.lower()}:"
+
+    @staticmethod
+    def _key(id) -> str:
+        try:
+            return str(uuid.UUID(str(id)))
+        except ValueError:
+            return str(id)
+
+    def get_data(self, id) -> dict | None:
+        # the stored column dict, for readers that do not need an entity
+        key = self._key(id)
+        data = self.local.get(key)
+        if data is None and self.backend is not None:
+            data = self.backend.get(self._prefix + key)
+            if data is not None:
+                self.local.set(key, data)
+        return data
+
+    def get(self, id):
+        data = self.get_data(id)
+        return self.model(**data) if data is not None else None
+
+    def set(self, instance) -> None:
+        key = self._key(instance.id)
+        data = instance.model_dump()
+        self.local.set(key, data)
+        if self.backend is not None:
+            self.backend.set(self._prefix + key, data, ttl=self.ttl)
+
+    def invalidate(self, id) -> None:
+        key = self._key(id)
+        self.local.delete(key)
+        if self.backend is not None:
+            self.backend.delete(self._prefix + key)
+
+
+class NamespacedCache:
+    # TTLCache-compatible view of part of a CacheBackend, for state every worker must see the same way
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.backend.get(f"{self.namespace}:{key}")
+        return default if value is None else value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        self.backend.set(f"{self.namespace}:{key}", value, ttl=self.ttl if ttl is None else ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.backend.delete(f"{self.namespace}:{key}")
@@ -26,6 +26,10 @@ class Configs(BaseSettings):
         "postgresql": "postgresql",
         "mysql": "mysql+pymysql",
     }
+    DB_ASYNC_ENGINE_MAPPER: dict = {
+        "postgresql": "postgresql+asyncpg",
+        "mysql": "mysql+aiomysql",
+    }
 
     PROJECT_ROOT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -35,8 +39,75 @@ class Configs(BaseSettings):
 
     # auth
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
+    # HS256 signs with SECRET_KEY; RS256 signs with the key ring in JWT_KEYS_DIR and publishes it as JWKS
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    JWT_KEYS_DIR: str = os.getenv("JWT_KEYS_DIR", "keys")
+    JWT_SIGNING_KID: str | None = os.getenv("JWT_SIGNING_KID")
+    JWKS_CACHE_SECONDS: int = int(os.getenv("JWKS_CACHE_SECONDS", 300))
+    INTROSPECT_MAX_TOKENS: int = int(os.getenv("INTROSPECT_MAX_TOKENS", 100))
+    # revoked access-token jtis; the bloom filter is sized for this many live revocations
+    REVOCATION_CAPACITY: int = int(os.getenv("REVOCATION_CAPACITY", 1_000_000))
+    REVOCATION_ERROR_RATE: float = float(os.getenv("REVOCATION_ERROR_RATE", 0.001))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 5  # 5 minutes
-    REFRESH_TOKEN_EXPIRE_DAYS: int = 60 * 24 * 30  # 60 minutes * 24 hours * 30 days = 30 days
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_PURGE_ENABLED: bool = os.getenv("REFRESH_TOKEN_PURGE_ENABLED", "true").lower() == "true"
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", 1000))
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = int(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", 3600))
+    # a just-rotated refresh token keeps returning the tokens it was exchanged for, for parallel and retried calls
+    REFRESH_TOKEN_GRACE_SECONDS: int = int(os.getenv("REFRESH_TOKEN_GRACE_SECONDS", 10))
+    REFRESH_TOKEN_GRACE_MAX_SIZE: int = int(os.getenv("REFRESH_TOKEN_GRACE_MAX_SIZE", 10000))
+
+    # metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # logging and tracing
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_JSON: bool = os.getenv("LOG_JSON", "false").lower() == "true"
+    # share of requests whose queries and summary are logged; slow ones are always logged
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+    TRACE_SLOW_QUERY_MS: float = float(os.getenv("TRACE_SLOW_QUERY_MS", 100))
+    TRACE_SLOW_REQUEST_MS: float = float(os.getenv("TRACE_SLOW_REQUEST_MS", 500))
+    JWT_CACHE_MAX_SIZE: int = int(os.getenv("JWT_CACHE_MAX_SIZE", 10000))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+    # local: every process keeps its own caches and counters; shared: workers on one host share them through the
+    # cache server that gunicorn.conf.py starts on SHARED_CACHE_SOCKET, in a directory it keeps private (0700)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")  # local | shared
+    SHARED_CACHE_SOCKET: str = os.getenv("SHARED_CACHE_SOCKET", "/tmp/auth-service-cache/cache.sock")
+    SHARED_CACHE_MAX_SIZE: int = int(os.getenv("SHARED_CACHE_MAX_SIZE", 200000))
+    # required in shared mode, and must differ from SECRET_KEY
+    SHARED_CACHE_AUTHKEY: str = os.getenv("SHARED_CACHE_AUTHKEY", "")
+    # bound on each round trip; calls are made from the event loop
+    SHARED_CACHE_TIMEOUT_SECONDS: float = float(os.getenv("SHARED_CACHE_TIMEOUT_SECONDS", 0.1))
+
+    # password hashing
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # bcrypt cost; pick it per environment with `python -m app.scripts.calibrate_password_hash`
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 12))
+    PASSWORD_HASH_TARGET_MS: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", 250))
+    # re-hash stored passwords whose cost differs from PASSWORD_HASH_ROUNDS after a successful sign-in
+    PASSWORD_REHASH_ON_LOGIN: bool = os.getenv("PASSWORD_REHASH_ON_LOGIN", "true").lower() == "true"
+    # hashes a bulk import may have in flight; the rest of the pool stays free for sign-ins
+    PASSWORD_HASH_BULK_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_BULK_CONCURRENCY", max(1, (os.cpu_count() or 1) // 2)))
+
+    # sign-in throttling: attempts per sliding window, counted per email and per client ip (0 turns the ip limit off;
+    # only turn it on once the client ip is trustworthy, see FORWARDED_*: behind a proxy every client shares its ip)
+    LOGIN_RATE_LIMIT_ENABLED: bool = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", 10))
+    LOGIN_RATE_LIMIT_PER_IP: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 0))
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", 60))
+
+    # client ip behind proxies: uvicorn takes X-Forwarded-For from these peers (gunicorn.conf.py passes them on;
+    # run plain uvicorn with --forwarded-allow-ips). When the proxies have no fixed address, set the number of them
+    # in front of the service instead and the client is read from that position of X-Forwarded-For
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    FORWARDED_TRUSTED_HOPS: int = int(os.getenv("FORWARDED_TRUSTED_HOPS", 0))
+
+    # bulk import/export
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", 500))
+    BULK_EXPORT_BATCH_SIZE: int = int(os.getenv("BULK_EXPORT_BATCH_SIZE", 1000))
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = os.getenv("ALLOW_ORIGIN", "*").split(",")
 
@@ -47,10 +118,16 @@ class Configs(BaseSettings):
     DB_HOST: str = os.getenv("DB_HOST")
     DB_PORT: str = os.getenv("DB_PORT", "3306")
     DB_ENGINE: str = DB_ENGINE_MAPPER.get(DB, "postgresql")
+    DB_ASYNC_ENGINE: str = DB_ASYNC_ENGINE_MAPPER.get(DB, "postgresql+asyncpg")
+    DB_MODE: str = os.getenv("DB_MODE", "sync")  # sync | asyncio
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
     DB_SCHEMA: str = os.getenv("DB_SCHEMA", "auth")
     DB_NAME: str = os.getenv("DB_NAME", ENV_DATABASE_MAPPER[ENV])
-    
-    print("DB_USER", DB_USER)
 
     DATABASE_URI_FORMAT: str = "{db_engine}://{user}:{password}@{host}:{port}/{database}"
 
@@ -63,6 +140,15 @@ class Configs(BaseSettings):
         database=DB_NAME,
     )
 
+    ASYNC_DATABASE_URI: str = DATABASE_URI_FORMAT.format(
+        db_engine=DB_ASYNC_ENGINE,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+    )
+
     # find query
     PAGE: int = 1
     PAGE_SIZE: int = 20
@@ -1,24 +1,149 @@
+import importlib
+
 from dependency_injector import containers, providers
 
+from app.core.cache import ModelCache, NamespacedCache, TTLCache
 from app.core.config import configs
-from app.core.database import Database
-from app.repository import UserRepository
-from app.repository.refresh_token_repository import RefreshTokenRepository
-from app.services import AuthService, UserService
+from app.core.database import AsyncDatabase, Database
+from app.core.rate_limit import InMemoryRateLimitBackend, LoginRateLimiter
+from app.core.revocation import RevocationList
+from app.core.shared_cache import (
+    SharedCacheBackend,
+    SharedCacheClient,
+    SharedRateLimitBackend,
+)
+from app.core.single_flight import SingleFlight
+
+
+def _imported(path: str):
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def _deferred(path: str):
+    # models, repositories and services (and through them jose, passlib and the key ring) load when a provider
+    # first builds one, not when the container is imported
+    def build(*args, **kwargs):
+        return _imported(path)(*args, **kwargs)
+
+    return build
 
 
 class Container(containers.DeclarativeContainer):
+    # wired by create_app; scripts that only need services skip importing the endpoint modules
     wiring_config = containers.WiringConfiguration(
         modules=[
             "app.core.dependencies",
             "app.api.v1.endpoints.auth",
             "app.api.v1.endpoints.user",
-        ]
+        ],
+        auto_wire=False,
     )
 
-    db = providers.Singleton(Database, db_url=configs.DATABASE_URI)
+    db_mode = providers.Object(configs.DB_MODE)
 
-    user_repository = providers.Factory(UserRepository, session_factory=db.provided.session)
-    refresh_token_repository = providers.Factory(RefreshTokenRepository, session_factory=db.provided.session)
-    auth_service = providers.Factory(AuthService, user_repository=user_repository, refresh_token_repository=refresh_token_repository)
-    user_service = providers.Factory(UserService, user_repository=user_repository)
+    db_options = dict(
+        echo=configs.DB_ECHO,
+        pool_size=configs.DB_POOL_SIZE,
+        max_overflow=configs.DB_MAX_OVERFLOW,
+        pool_timeout=configs.DB_POOL_TIMEOUT,
+        pool_recycle=configs.DB_POOL_RECYCLE,
+        pool_pre_ping=configs.DB_POOL_PRE_PING,
+    )
+
+    db = providers.Selector(
+        db_mode,
+        sync=providers.Singleton(Database, db_url=configs.DATABASE_URI, **db_options),
+        asyncio=providers.Singleton(AsyncDatabase, db_url=configs.ASYNC_DATABASE_URI, **db_options),
+    )
+
+    # shared store behind the in-process caches: the host-local cache server in shared mode (see gunicorn.conf.py),
+    # override with a redis/memcached backed CacheBackend to share across hosts
+    cache_mode = providers.Object(configs.CACHE_BACKEND)
+    shared_cache = providers.Singleton(
+        SharedCacheClient,
+        address=configs.SHARED_CACHE_SOCKET,
+        authkey=configs.SHARED_CACHE_AUTHKEY.encode(),
+        timeout=configs.SHARED_CACHE_TIMEOUT_SECONDS,
+    )
+    cache_backend = providers.Selector(
+        cache_mode,
+        local=providers.Object(None),
+        shared=providers.Singleton(SharedCacheBackend, client=shared_cache),
+    )
+    # a logout handled by one worker must be refused by all of them: in shared mode revocations go through the backend
+    revocation_list = providers.Selector(
+        cache_mode,
+        local=providers.Callable(_imported, "app.core.security.revoked_tokens"),
+        shared=providers.Singleton(
+            RevocationList,
+            capacity=configs.REVOCATION_CAPACITY,
+            error_rate=configs.REVOCATION_ERROR_RATE,
+            rebuild_seconds=configs.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            backend=cache_backend,
+        ),
+    )
+    user_cache = providers.Singleton(
+        ModelCache,
+        model=providers.Callable(_imported, "app.model.user.User"),
+        max_size=configs.USER_CACHE_MAX_SIZE,
+        ttl=configs.USER_CACHE_TTL_SECONDS,
+        backend=cache_backend,
+    )
+
+    user_repository = providers.Selector(
+        db_mode,
+        sync=providers.Factory(_deferred("app.repository.UserRepository"), session_factory=db.provided.session, cache=user_cache),
+        asyncio=providers.Factory(_deferred("app.repository.AsyncUserRepository"), session_factory=db.provided.session, cache=user_cache),
+    )
+    refresh_token_repository = providers.Selector(
+        db_mode,
+        sync=providers.Factory(_deferred("app.repository.RefreshTokenRepository"), session_factory=db.provided.session),
+        asyncio=providers.Factory(_deferred("app.repository.AsyncRefreshTokenRepository"), session_factory=db.provided.session),
+    )
+    job_lease_repository = providers.Selector(
+        db_mode,
+        sync=providers.Factory(_deferred("app.repository.JobLeaseRepository"), session_factory=db.provided.session),
+        asyncio=providers.Factory(_deferred("app.repository.AsyncJobLeaseRepository"), session_factory=db.provided.session),
+    )
+    # per-process counters unless shared; override with a redis backed RateLimitBackend so limits hold across pods
+    rate_limit_backend = providers.Selector(
+        cache_mode,
+        local=providers.Singleton(InMemoryRateLimitBackend),
+        shared=providers.Singleton(SharedRateLimitBackend, client=shared_cache),
+    )
+    login_rate_limiter = providers.Singleton(
+        LoginRateLimiter,
+        backend=rate_limit_backend,
+        per_email=configs.LOGIN_RATE_LIMIT_PER_EMAIL,
+        per_ip=configs.LOGIN_RATE_LIMIT_PER_IP,
+        window=configs.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+        enabled=configs.LOGIN_RATE_LIMIT_ENABLED,
+    )
+    # AuthService is built per request; what it coalesces and remembers across requests lives here
+    auth_single_flight = providers.Singleton(SingleFlight)
+    # shared so a retried refresh that lands on another worker still gets the tokens it was rotated to
+    refresh_grace_cache = providers.Selector(
+        cache_mode,
+        local=providers.Singleton(TTLCache, max_size=configs.REFRESH_TOKEN_GRACE_MAX_SIZE, ttl=configs.REFRESH_TOKEN_GRACE_SECONDS),
+        shared=providers.Singleton(
+            NamespacedCache, backend=cache_backend, namespace="refresh-grace", ttl=configs.REFRESH_TOKEN_GRACE_SECONDS
+        ),
+    )
+    auth_service = providers.Factory(
+        _deferred("app.services.AuthService"),
+        user_repository=user_repository,
+        refresh_token_repository=refresh_token_repository,
+        login_rate_limiter=login_rate_limiter,
+        single_flight=auth_single_flight,
+        refresh_grace_cache=refresh_grace_cache,
+        revocation_list=revocation_list,
+    )
+    user_service = providers.Factory(_deferred("app.services.UserService"), user_repository=user_repository)
+    token_purge_service = providers.Singleton(
+        _deferred("app.services.TokenPurgeService"),
+        refresh_token_repository=refresh_token_repository,
+        batch_size=configs.REFRESH_TOKEN_PURGE_BATCH_SIZE,
+        interval=configs.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS,
+        lease_repository=job_lease_repository,
+    )
@@ -1,9 +1,25 @@
-from contextlib import AbstractContextManager, contextmanager
-from typing import Any, Callable
+import os
+import threading
+import time
+import weakref
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    asynccontextmanager,
+    contextmanager,
+)
+from contextvars import Context, ContextVar, copy_context
+from functools import partial
+from typing import Any, Awaitable, Callable
 
-from sqlalchemy import create_engine, orm
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.interception import Interception
+from app.core.metrics import db_pool_checkout_duration
 
 
 @as_declarative()
@@ -18,22 +34,210 @@ class BaseModel:
         return cls.__name__.lower()
 
 
+def _engine_options(
+    db_url: str,
+    echo: bool = False,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: int = 30,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+) -> dict:
+    options = {"echo": echo, "pool_recycle": pool_recycle, "pool_pre_ping": pool_pre_ping}
+    # sqlite pools are per-file/per-thread and do not accept sizing arguments
+    if not db_url.startswith("sqlite"):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return options
+
+
+def _after_fork(ref: weakref.ref) -> None:
+    database = ref()
+    if database is not None:
+        database.reset_after_fork()
+
+
+class PoolMetrics:
+    # running totals in snapshot(); the pool sizes and the wait maximum are gauges
+    COUNTERS = ("connects", "checkouts", "checkins", "wait_count", "wait_seconds_total")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def register(self, pool) -> None:
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+
+    def _on_connect(self, *_) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *_) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        db_pool_checkout_duration.observe(seconds)
+
+    def snapshot(self, pool) -> dict:
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "wait_count": self.wait_count,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+
+class _RequestScope:
+    # one connection and session shared by every repository call of a request
+    def __init__(self, release: Callable[["_RequestScope"], Awaitable[None]]) -> None:
+        self.connection = None
+        self.session = None
+        self.closed = False
+        self._release = release
+
+    async def release(self) -> None:
+        await self._release(self)
+
+
+# the scope of whichever database serves the current request, for code that knows nothing about the database
+_current_scope: ContextVar[_RequestScope | None] = ContextVar("db_current_request_scope", default=None)
+
+
+def without_request_scope() -> Context:
+    # a copy of the current context with no request scope active, for work shared between requests (or outliving
+    # them): repository calls run in it open sessions of their own instead of borrowing the caller's
+    context = copy_context()
+    context.run(_current_scope.set, None)
+    return context
+
+
+def _active_scope(scope: _RequestScope | None) -> bool:
+    return scope is not None and not scope.closed and _current_scope.get() is not None
+
+
+async def release_request_connection() -> None:
+    # hands the request's connection back to the pool before a wait that does not need it (password hashing,
+    # sending the response, background tasks); the next repository call of the request checks out a fresh one
+    scope = _current_scope.get()
+    if scope is not None and scope.session is not None:
+        await scope.release()
+
+
 class Database:
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url, echo=True)
+    def __init__(self, db_url: str, **options) -> None:
+        # the engine, and with it the DBAPI driver import, is created on first use rather than at startup
+        self._db_url = db_url
+        self._options = options
+        self._engine = None
+        self._engine_lock = threading.Lock()
         self._session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
                 autoflush=False,
-                bind=self._engine,
             ),
         )
+        self._request_session_maker = orm.sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+        self._request_scope: ContextVar[_RequestScope | None] = ContextVar(f"db_request_scope_{id(self)}", default=None)
+        self.pool_metrics = PoolMetrics()
+        os.register_at_fork(after_in_child=partial(_after_fork, weakref.ref(self)))
+
+    @property
+    def engine(self):
+        return self._ensure_engine()
+
+    def _ensure_engine(self):
+        # creates the engine and binds the session factory to it on first use
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    engine = create_engine(self._db_url, **_engine_options(self._db_url, **self._options))
+                    self.pool_metrics.register(engine.pool)
+                    Interception.register(engine)
+                    self._session_factory.configure(bind=engine)
+                    self._engine = engine
+        return self._engine
+
+    def reset_after_fork(self) -> None:
+        # a forked worker must not share the parent's pooled connections: drop them without closing the parent's sockets
+        self._engine_lock = threading.Lock()
+        if self._engine is not None:
+            self._engine.dispose(close=False)
 
     def create_database(self) -> None:
-        BaseModel.metadata.create_all(self._engine)
+        from sqlmodel import SQLModel
+
+        SQLModel.metadata.create_all(self.engine)
+
+    def pool_stats(self) -> dict:
+        return self.pool_metrics.snapshot(self.engine.pool)
+
+    def _request_session(self, scope: _RequestScope) -> Session:
+        if scope.session is None:
+            started = time.perf_counter()
+            scope.connection = self.engine.connect()
+            self.pool_metrics.observe_wait(time.perf_counter() - started)
+            scope.session = self._request_session_maker(bind=scope.connection)
+        return scope.session
+
+    @staticmethod
+    def _close_connection(scope: _RequestScope) -> None:
+        session, connection = scope.session, scope.connection
+        scope.session = scope.connection = None
+        if session is not None:
+            session.close()
+            connection.close()
+
+    async def _release(self, scope: _RequestScope) -> None:
+        if scope.session is not None:
+            await run_in_threadpool(self._close_connection, scope)
+
+    @asynccontextmanager
+    async def request_scope(self):
+        scope = _RequestScope(self._release)
+        token = self._request_scope.set(scope)
+        current = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            self._request_scope.reset(token)
+            _current_scope.reset(current)
+            scope.closed = True
+            await self._release(scope)
 
     @contextmanager
     def session(self) -> Callable[..., AbstractContextManager[Session]]:
+        scope = self._request_scope.get()
+        if _active_scope(scope):
+            session = self._request_session(scope)
+            try:
+                yield session
+            except Exception:
+                session.rollback()
+                raise
+            return
+
+        self._ensure_engine()
         session: Session = self._session_factory()
         try:
             yield session
@@ -42,3 +246,101 @@ class Database:
             raise
         finally:
             session.close()
+
+
+class AsyncDatabase:
+    def __init__(self, db_url: str, **options) -> None:
+        self._db_url = db_url
+        self._options = options
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        # instances outlive their session, so they must not expire on commit
+        self._session_factory = async_sessionmaker(
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self._request_session_maker = async_sessionmaker(autoflush=False, expire_on_commit=False)
+        self._request_scope: ContextVar[_RequestScope | None] = ContextVar(f"db_request_scope_{id(self)}", default=None)
+        self.pool_metrics = PoolMetrics()
+        os.register_at_fork(after_in_child=partial(_after_fork, weakref.ref(self)))
+
+    @property
+    def engine(self):
+        return self._ensure_engine()
+
+    def _ensure_engine(self):
+        # creates the engine and binds the session factory to it on first use
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    engine = create_async_engine(self._db_url, **_engine_options(self._db_url, **self._options))
+                    self.pool_metrics.register(engine.sync_engine.pool)
+                    Interception.register(engine.sync_engine)
+                    self._session_factory.configure(bind=engine)
+                    self._engine = engine
+        return self._engine
+
+    def reset_after_fork(self) -> None:
+        self._engine_lock = threading.Lock()
+        if self._engine is not None:
+            self._engine.sync_engine.dispose(close=False)
+
+    async def create_database(self) -> None:
+        from sqlmodel import SQLModel
+
+        async with self.engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+    def pool_stats(self) -> dict:
+        return self.pool_metrics.snapshot(self.engine.sync_engine.pool)
+
+    async def _request_session(self, scope: _RequestScope) -> AsyncSession:
+        if scope.session is None:
+            started = time.perf_counter()
+            scope.connection = await self.engine.connect()
+            self.pool_metrics.observe_wait(time.perf_counter() - started)
+            scope.session = self._request_session_maker(bind=scope.connection)
+        return scope.session
+
+    @staticmethod
+    async def _release(scope: _RequestScope) -> None:
+        session, connection = scope.session, scope.connection
+        scope.session = scope.connection = None
+        if session is not None:
+            await session.close()
+            await connection.close()
+
+    @asynccontextmanager
+    async def request_scope(self):
+        scope = _RequestScope(self._release)
+        token = self._request_scope.set(scope)
+        current = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            self._request_scope.reset(token)
+            _current_scope.reset(current)
+            scope.closed = True
+            await self._release(scope)
+
+    @asynccontextmanager
+    async def session(self) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        scope = self._request_scope.get()
+        if _active_scope(scope):
+            session = await self._request_session(scope)
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+            return
+
+        self._ensure_engine()
+        session: AsyncSession = self._session_factory()
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
@@ -1,30 +1,30 @@
 from typing import Any
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import Depends
+from fastapi import Depends, Request
 from jose import jwt
 from pydantic import ValidationError
 
 from app.core.config import configs
 from app.core.container import Container
 from app.core.exceptions import AuthError
-from app.core.security import ALGORITHM, JWTBearer
+from app.core.security import JWTBearer, verify_jwt_claims
 from app.model.user import User
 from app.schema.auth_schema import TokenPayload
 from app.services.user_service import UserService
 
 
 @inject
-def get_current_user(
+async def get_current_user(
     token: str = Depends(JWTBearer()),
     service: UserService = Depends(Provide[Container.user_service]),
 ) -> User:
     try:
-        payload = jwt.decode(token, configs.SECRET_KEY, algorithms=ALGORITHM)
+        payload = verify_jwt_claims(token)
         token_data = TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise AuthError(detail="Could not validate credentials")
-    current_user: User = service.get_by_id(token_data.subject)
+    current_user: User = await service.get_by_id(token_data.subject)
     if not current_user:
         raise AuthError(detail="User not found")
     return current_user
@@ -35,7 +35,7 @@ def validate_token(
     token: str = Depends(JWTBearer()),
 ) -> dict[str, Any]:
     try:
-        payload = jwt.decode(token, configs.SECRET_KEY, algorithms=ALGORITHM)
+        payload = verify_jwt_claims(token)
         if payload["token_type"] != "access":
             raise AuthError(detail="Invalid token type")
         return payload
@@ -65,3 +65,13 @@ def get_current_super_user(current_user: User = Depends(get_current_user)) -> Us
     if not current_user.is_superuser:
         raise AuthError("It's not a super user")
     return current_user
+
+
+def get_client_ip(request: Request) -> str | None:
+    # each of the trusted proxies appends the address it was reached from; anything left of the outermost one
+    # is whatever the client sent. Without hops the peer is the client, after uvicorn applied FORWARDED_ALLOW_IPS
+    hops = configs.FORWARDED_TRUSTED_HOPS
+    if hops:
+        forwarded = [host.strip() for host in ",".join(request.headers.getlist("x-forwarded-for")).split(",") if host.strip()]
+        return forwarded[-hops] if len(forwarded) >= hops else None
+    return request.client.host if request.client else None
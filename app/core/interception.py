@@ -1,22 +1,31 @@
+import time
+
+from loguru import logger
 from sqlalchemy import event
-from sqlalchemy.orm import Session
+
+from app.core.config import configs
+from app.core.tracing import current_trace
 
 
 class Interception:
+    # engine-level query timing; replaces the per-row ORM hooks that printed every instance
     @staticmethod
-    @event.listens_for(Session, "before_update")
-    def before_update(session, instance):
-        print("before_update")
-        print(instance)
+    def register(engine) -> None:
+        event.listen(engine, "before_cursor_execute", Interception.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", Interception.after_cursor_execute)
 
     @staticmethod
-    @event.listens_for(Session, "before_insert")
-    def before_insert(session, instance):
-        print("before_insert")
-        print(instance)
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("query_started", []).append(time.perf_counter())
 
     @staticmethod
-    @event.listens_for(Session, "before_attach")
-    def before_attach(session, instance):
-        print("before_attach")
-        print(instance)
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - connection.info["query_started"].pop()
+        trace = current_trace()
+        if trace is not None:
+            trace.add_query(seconds)
+        # only sampled requests and slow queries pay for a log record
+        if seconds * 1000 >= configs.TRACE_SLOW_QUERY_MS:
+            logger.warning("slow query {:.1f}ms: {}", seconds * 1000, statement[:500])
+        elif trace is not None and trace.sampled:
+            logger.debug("query {:.1f}ms: {}", seconds * 1000, statement[:500])
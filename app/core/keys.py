@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+from app.core.config import configs
+
+
+class KeyRing:
+    # one signing key plus every public key that may still verify tokens in flight.
+    # Keys are parsed once here; python-jose would otherwise re-parse the PEM on every call.
+    def __init__(
+        self, algorithm: str, private_keys: dict | None = None, public_keys: dict | None = None, signing_kid: str = None, secret: str = None
+    ) -> None:
+        self.algorithm = algorithm
+        self._verification_keys = {}
+        if algorithm.startswith("HS"):
+            # shared secret: no kid and nothing to publish
+            self._signing_kid, self._signing_key = None, jwk.construct(secret, algorithm)
+            self._jwks = {"keys": []}
+            return
+
+        private = {kid: jwk.construct(pem, algorithm) for kid, pem in (private_keys or {}).items()}
+        if not private:
+            raise ValueError(f"{algorithm} signing needs at least one private key")
+        self._signing_kid = signing_kid or next(iter(private))
+        if self._signing_kid not in private:
+            raise ValueError(f"no private key for signing kid {self._signing_kid}")
+        self._signing_key = private[self._signing_kid]
+        self._verification_keys = {kid: key.public_key() for kid, key in private.items()}
+        self._verification_keys.update({kid: jwk.construct(pem, algorithm) for kid, pem in (public_keys or {}).items()})
+        self._jwks = {"keys": [{**key.to_dict(), "kid": kid, "use": "sig"} for kid, key in self._verification_keys.items()]}
+
+    @classmethod
+    def from_directory(cls, algorithm: str, directory: str, signing_kid: str = None) -> "KeyRing":
+        # <kid>.pem private keys sign and verify, <kid>.pub.pem public keys only verify (retired signers);
+        # without an explicit signing kid the most recently written private key signs
+        private_keys, public_keys = {}, {}
+        for name in sorted(os.listdir(directory), key=lambda name: os.path.getmtime(os.path.join(directory, name)), reverse=True):
+            with open(os.path.join(directory, name)) as file:
+                if name.endswith(".pub.pem"):
+                    public_keys[name[: -len(".pub.pem")]] = file.read()
+                elif name.endswith(".pem"):
+                    private_keys[name[: -len(".pem")]] = file.read()
+        return cls(algorithm, private_keys, public_keys, signing_kid)
+
+    @property
+    def signing_kid(self) -> str | None:
+        return self._signing_kid
+
+    def sign(self, claims: dict) -> str:
+        headers = {"kid": self._signing_kid} if self._signing_kid else None
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> dict:
+        if self._signing_kid is None:
+            return jwt.decode(token, self._signing_key, algorithms=[self.algorithm])
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verification_keys.get(kid)
+        if key is None:
+            raise JWTError(f"unknown key id: {kid}")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+
+def load_key_ring() -> KeyRing:
+    if configs.JWT_ALGORITHM.startswith("HS"):
+        return KeyRing(configs.JWT_ALGORITHM, secret=configs.SECRET_KEY)
+    return KeyRing.from_directory(configs.JWT_ALGORITHM, configs.JWT_KEYS_DIR, configs.JWT_SIGNING_KID)
+
+
+def verify_with_jwks(token: str, jwks: dict, algorithms=("RS256",)) -> dict:
+    kid = jwt.get_unverified_header(token).get("kid")
+    for key in jwks.get("keys", []):
+        if key.get("kid") == kid:
+            return jwt.decode(token, key, algorithms=list(algorithms))
+    raise JWTError(f"unknown key id: {kid}")
+
+
+class JWKSVerifier:
+    # for services that consume our tokens: verifies locally against a cached copy of /.well-known/jwks.json,
+    # refetching at most once per min_refresh seconds when a token names an unknown kid (key rotation)
+    def __init__(self, url: str, ttl: int = 300, min_refresh: int = 30, algorithms=("RS256",)) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.algorithms = tuple(algorithms)
+        self._lock = threading.Lock()
+        self._jwks = {"keys": []}
+        self._fetched_at = 0.0
+
+    def _fetch(self) -> None:
+        with urllib.request.urlopen(self.url, timeout=5) as response:
+            self._jwks = json.loads(response.read())
+        self._fetched_at = time.monotonic()
+
+    def _known(self, kid) -> bool:
+        return any(key.get("kid") == kid for key in self._jwks.get("keys", []))
+
+    def verify(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if age > self.ttl or (not self._known(kid) and age > self.min_refresh):
+                self._fetch()
+            jwks = self._jwks
+        return verify_with_jwks(token, jwks, self.algorithms)
+
+
+def jwks_etag(jwks: dict) -> str:
+    return '"' + hashlib.sha256(json.dumps(jwks, sort_keys=True).encode()).hexdigest()[:32] + '"'
@@ -0,0 +1,144 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# seconds; wide enough for sub-millisecond cache hits and multi-second bcrypt queues
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                extra = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, extra)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics = []
+        self._collectors: list[tuple[str, Callable[[], dict], frozenset]] = []
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, collector: Callable[[], dict], counters=()) -> None:
+        # collector is called at scrape time; keys in counters are running totals and become prefix_key_total
+        # counters, every other numeric value becomes a gauge named prefix_key
+        self._collectors.append((prefix, collector, frozenset(counters)))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, collector, counters in self._collectors:
+            for key, value in collector().items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key in counters:
+                    name = f"{prefix}_{key}" if key.endswith("_total") else f"{prefix}_{key}_total"
+                    lines.append(f"# TYPE {name} counter")
+                else:
+                    name = f"{prefix}_{key}"
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status", ("method", "route", "status")
+)
+password_hash_duration = registry.histogram("password_hash_duration_seconds", "bcrypt hash and verify time", ("operation",))
+jwt_duration = registry.histogram("jwt_duration_seconds", "JWT signing and verification time", ("operation",))
+repository_duration = registry.histogram(
+    "repository_call_duration_seconds", "Repository call latency including pool checkout", ("repository", "method")
+)
+db_pool_checkout_duration = registry.histogram("db_pool_checkout_duration_seconds", "Time spent waiting for a pooled connection")
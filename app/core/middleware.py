@@ -0,0 +1,96 @@
+import time
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import configs
+from app.core.metrics import http_request_duration, http_requests
+from app.core.tracing import end_trace, start_trace
+
+
+class DatabaseSessionMiddleware:
+    # opens a request scope so all repository calls of one request share a single pooled connection
+    def __init__(self, app: ASGIApp, db) -> None:
+        self.app = app
+        self.db = db
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        async with self.db.request_scope() as request_scope:
+
+            async def send_wrapper(message: Message) -> None:
+                await send(message)
+                # the handler is done with the database once the response starts; background tasks and streamed
+                # bodies check out a connection again only if they need one
+                if message["type"] == "http.response.start":
+                    await request_scope.release()
+
+            await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    # records latency per route template, so path parameters do not explode the label set
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched"), "status": status}
+            http_request_duration.observe(time.perf_counter() - started, **labels)
+            http_requests.inc(**labels)
+
+
+class TracingMiddleware:
+    # correlation id per request (X-Request-ID in and out) and one summary line for sampled, slow or failed requests
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        trace, token = start_trace(incoming.decode("latin-1")[:64] if incoming else None)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", trace.request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            milliseconds = (time.perf_counter() - started) * 1000
+            if trace.sampled or status >= 500 or milliseconds >= configs.TRACE_SLOW_REQUEST_MS:
+                logger.bind(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration_ms=round(milliseconds, 2),
+                    queries=trace.queries,
+                    query_ms=round(trace.query_seconds * 1000, 2),
+                ).info("{} {} {} {:.1f}ms ({} queries)", scope["method"], scope["path"], status, milliseconds, trace.queries)
+            end_trace(token)
@@ -0,0 +1,98 @@
+import math
+import threading
+import time
+from typing import Callable
+
+from app.core.exceptions import TooManyRequestsError
+
+
+class RateLimitBackend:
+    # counters shared by every worker; a redis/memcached implementation maps incr to INCR + EXPIRE
+    def incr(self, key: str, ttl: float) -> int:
+        raise NotImplementedError
+
+    def get(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    # process-local counters, for tests and single-process deployments
+    def __init__(self, max_size: int = 100000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters: dict[str, tuple[int, float]] = {}
+
+    def incr(self, key: str, ttl: float) -> int:
+        now = self._clock()
+        with self._lock:
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                count, expires_at = 0, now + ttl
+            self._counters[key] = (count + 1, expires_at)
+            if len(self._counters) > self.max_size:
+                self._evict(now)
+            return count + 1
+
+    def get(self, key: str) -> int:
+        count, expires_at = self._counters.get(key, (0, 0.0))
+        return count if expires_at > self._clock() else 0
+
+    def _evict(self, now: float) -> None:
+        self._counters = {key: entry for key, entry in self._counters.items() if entry[1] > now}
+        # still full of live keys (a flood of distinct ones): drop the oldest rather than grow without bound
+        while len(self._counters) > self.max_size:
+            self._counters.pop(next(iter(self._counters)))
+
+
+class SlidingWindowLimiter:
+    # sliding window counter: the previous fixed window is weighted by how much of it still overlaps the
+    # sliding one, so two backend counters per key give a smooth limit without storing every hit
+    def __init__(self, backend: RateLimitBackend, limit: int, window: float, clock: Callable[[], float] = time.time) -> None:
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+
+    def hit(self, key: str) -> float | None:
+        # counts one attempt; returns the seconds to wait when the key is over its limit
+        now = self._clock()
+        index, elapsed = divmod(now, self.window)
+        current = self.backend.incr(f"{key}:{int(index)}", ttl=2 * self.window)
+        previous = self.backend.get(f"{key}:{int(index) - 1}")
+        remaining = self.window - elapsed
+        if previous * remaining / self.window + current <= self.limit:
+            return None
+        if current > self.limit:
+            # this window alone is over: wait for it to end and then decay far enough as the previous one
+            return remaining + self.window * (1 - self.limit / current)
+        return remaining - (self.limit - current) * self.window / previous
+
+
+class LoginRateLimiter:
+    # checked before any password is verified, so throttled attempts never reach bcrypt
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        per_email: int,
+        per_ip: int,
+        window: float,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.enabled = enabled
+        self.email_limiter = SlidingWindowLimiter(backend, per_email, window, clock)
+        self.ip_limiter = SlidingWindowLimiter(backend, per_ip, window, clock) if per_ip > 0 else None
+
+    def check(self, email: str, ip: str | None = None) -> None:
+        if not self.enabled:
+            return
+        waits = [self.email_limiter.hit(f"login:email:{email.lower()}")]
+        if ip and self.ip_limiter is not None:
+            waits.append(self.ip_limiter.hit(f"login:ip:{ip}"))
+        wait = max((wait for wait in waits if wait is not None), default=None)
+        if wait is not None:
+            raise TooManyRequestsError(
+                detail="Too many sign-in attempts, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
@@ -0,0 +1,16 @@
+from functools import lru_cache
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    # building an adapter compiles the pydantic-core validator and serializer, so do it once per type
+    return TypeAdapter(tp)
+
+
+def json_response(value, tp=None, status_code: int = 200) -> Response:
+    # for values the service already built as `tp`: serialized straight to JSON bytes in pydantic-core,
+    # skipping FastAPI's response_model re-validation and the intermediate python dict
+    return Response(type_adapter(tp or type(value)).dump_json(value), status_code=status_code, media_type="application/json")
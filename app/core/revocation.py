@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # double hashing with the interpreter's own (per-process seeded) string hash, which is cached on the str;
+        # the filter never leaves the process, so a stable digest would only cost time
+        first = hash(key)
+        second = hash((key, self.size)) | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        first = hash(key)
+        second = hash((key, self.size)) | 1
+        for index in range(self.hash_count):
+            position = (first + index * second) % self.size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    # revoked jtis: a bloom filter answers "definitely not revoked" for almost every request without a lock,
+    # the exact dict (jti -> exp) settles the rare positives. Entries leave the dict when their token expires
+    # and the filter is rebuilt from the survivors every rebuild_seconds, so memory tracks live revocations. The
+    # rebuild is noticed on the read path and runs on a background thread, so no request waits for it.
+    # With a backend (app.core.shared_cache.SharedCacheBackend) revocations are also published to the other
+    # workers, which pull them at most once per sync_seconds, so a token revoked in one worker is refused by all.
+    # The pull is a blocking round trip, so like the rebuild it runs on a background thread.
+    def __init__(
+        self, capacity: int, error_rate: float = 0.001, rebuild_seconds: float = 300, backend=None, sync_seconds: float = 1
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[str, float] = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self._next_rebuild = time.time() + rebuild_seconds
+        self._rebuild_thread: threading.Thread | None = None
+        # revocations made while a rebuild runs; they are added to the new filter before it is swapped in
+        self._pending: list[tuple[str, float]] | None = None
+        self._next_sync = 0.0
+        self._cursor = 0
+        self._sync_thread: threading.Thread | None = None
+
+    def revoke(self, jti: str, exp: float) -> None:
+        ttl = exp - time.time()
+        if ttl <= 0:
+            return
+        self._add(jti, exp)
+        if self.backend is not None:
+            self.backend.publish("revocations", (jti, exp), ttl)
+        self._maybe_rebuild()
+
+    def _add(self, jti: str, exp: float) -> None:
+        with self._lock:
+            self._entries[jti] = exp
+            self._filter.add(jti)
+            if self._pending is not None:
+                self._pending.append((jti, exp))
+
+    def _maybe_sync(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sync or (self._sync_thread is not None and self._sync_thread.is_alive()):
+                return
+            self._next_sync = now + self.sync_seconds
+            self._sync_thread = threading.Thread(target=self._sync, name="revocation-sync", daemon=True)
+        self._sync_thread.start()
+
+    def _sync(self) -> None:
+        self._cursor, revoked = self.backend.updates("revocations", self._cursor)
+        for jti, exp in revoked:
+            self._add(jti, exp)
+
+    def is_revoked(self, jti: str | None) -> bool:
+        if self.backend is not None:
+            self._maybe_sync()
+        self._maybe_rebuild()
+        if jti is None or jti not in self._filter:
+            return False
+        exp = self._entries.get(jti)
+        return exp is not None and exp > time.time()
+
+    def _maybe_rebuild(self) -> None:
+        now = time.time()
+        if now < self._next_rebuild:
+            return
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+            self._next_rebuild = now + self.rebuild_seconds
+        self._rebuild_thread = threading.Thread(target=self._rebuild, name="revocation-rebuild", daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild(self) -> None:
+        try:
+            now = time.time()
+            with self._lock:
+                entries = list(self._entries.items())
+            survivors = {jti: exp for jti, exp in entries if exp > now}
+            rebuilt = BloomFilter(max(self.capacity, len(survivors)), self.error_rate)
+            for jti in survivors:
+                rebuilt.add(jti)
+            with self._lock:
+                for jti, exp in self._pending:
+                    survivors[jti] = exp
+                    rebuilt.add(jti)
+                self._entries = survivors
+                self._filter = rebuilt
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def stats(self) -> dict:
+        return {"revoked": len(self._entries), "filter_bits": self._filter.size, "hash_count": self._filter.hash_count}
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,16 +1,26 @@
+import asyncio
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from fastapi import Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import configs
-from app.core.exceptions import AuthError
+from app.core.database import release_request_connection
+from app.core.exceptions import AuthError, ServiceUnavailableError
+from app.core.keys import load_key_ring
+from app.core.metrics import jwt_duration, password_hash_duration
+from app.core.revocation import RevocationList
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-ALGORITHM = "HS256"
+# hashes made with any other cost report needs_update, which is what drives rehash-on-login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=configs.PASSWORD_HASH_ROUNDS)
+key_ring = load_key_ring()
 
 
 def create_jwt_token(subject: dict, expires_delta: timedelta = None) -> (str, str):
@@ -19,29 +29,155 @@ def create_jwt_token(subject: dict, expires_delta: timedelta = None) -> (str, st
     else:
         expire = datetime.utcnow() + timedelta(minutes=configs.ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"exp": expire, "jti": uuid.uuid4().__str__(), **subject}
-    encoded_jwt = jwt.encode(payload, configs.SECRET_KEY, algorithm=ALGORITHM)
+    with jwt_duration.time(operation="sign"):
+        encoded_jwt = key_ring.sign(payload)
     expiration_datetime = expire.strftime(configs.DATETIME_FORMAT)
     return encoded_jwt, expiration_datetime
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with password_hash_duration.time(operation="verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with password_hash_duration.time(operation="hash"):
+        return pwd_context.hash(password)
 
 
-def decode_jwt(token: str, validate_token: bool) -> dict:
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3) -> tuple[int, dict]:
+    # the highest cost whose median verify stays within target_ms on this machine; each round doubles the work,
+    # so measuring stops at the first cost over the target
+    timings = {}
+    for rounds in range(min_rounds, max_rounds + 1):
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash("calibration-password")
+        durations = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            context.verify("calibration-password", hashed)
+            durations.append((time.perf_counter() - started) * 1000)
+        timings[rounds] = sorted(durations)[len(durations) // 2]
+        if timings[rounds] > target_ms:
+            break
+    within = [rounds for rounds, ms in timings.items() if ms <= target_ms]
+    return (max(within) if within else min_rounds), timings
+
+
+# bcrypt releases the GIL, so a thread pool scales with cores.
+# Calls beyond max_workers + max_queue are rejected with 503 instead of queueing forever.
+class PasswordHashExecutor:
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 1) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._retry_after = retry_after
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailableError(
+                detail="Password hashing is saturated, try again later",
+                headers={"Retry-After": str(self._retry_after)},
+            )
+        # a queued hash can wait far longer than pool_timeout; it must not keep a pooled connection meanwhile
+        try:
+            await release_request_connection()
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def map(self, fn, items, concurrency: int) -> list:
+        # bulk work keeps at most `concurrency` items in the pool and takes no admission slots,
+        # so a large import delays interactive hashing by a bounded amount instead of getting it rejected
+        semaphore = asyncio.Semaphore(concurrency)
+        await release_request_connection()
+
+        async def submit(item):
+            async with semaphore:
+                return await asyncio.wrap_future(self._executor.submit(fn, item))
+
+        return await asyncio.gather(*(submit(item) for item in items))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hash_executor = PasswordHashExecutor(
+    max_workers=configs.PASSWORD_HASH_WORKERS,
+    max_queue=configs.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=configs.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_executor.run(get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: list[str]) -> list[str]:
+    return await password_hash_executor.map(get_password_hash, passwords, configs.PASSWORD_HASH_BULK_CONCURRENCY)
+
+
+# verified claims keyed by the raw token, kept until the token expires
+verified_token_cache = TTLCache(max_size=configs.JWT_CACHE_MAX_SIZE)
+
+
+def verify_jwt_claims(token: str) -> dict:
+    claims = verified_token_cache.get(token)
+    if claims is None:
+        with jwt_duration.time(operation="verify"):
+            claims = key_ring.verify(token)
+        ttl = claims["exp"] - time.time()
+        if ttl > 0:
+            verified_token_cache.set(token, claims, ttl=ttl)
+    return claims
+
+
+# revoked access tokens are only ever short-lived, so the filter is rebuilt once per access-token lifetime.
+# This process-local list is the default; the app takes its list from Container.revocation_list
+revoked_tokens = RevocationList(
+    capacity=configs.REVOCATION_CAPACITY,
+    error_rate=configs.REVOCATION_ERROR_RATE,
+    rebuild_seconds=configs.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def revoke_token(token: str, revocations: RevocationList | None = None) -> bool:
+    try:
+        claims = verify_jwt_claims(token)
+    except JWTError:
+        return False
+    (revoked_tokens if revocations is None else revocations).revoke(claims["jti"], claims["exp"])
+    return True
+
+
+def decode_jwt(token: str, validate_token: bool, revocations: RevocationList | None = None) -> dict:
     try:
-        decoded_token = (
-            jwt.get_unverified_claims(token) if not validate_token else jwt.decode(token, configs.SECRET_KEY, algorithms=[ALGORITHM])
-        )
+        decoded_token = jwt.get_unverified_claims(token) if not validate_token else verify_jwt_claims(token)
+        if (revoked_tokens if revocations is None else revocations).is_revoked(decoded_token.get("jti")):
+            raise JWTError("Token has been revoked")
         return decoded_token if decoded_token["exp"] and not validate_token >= int(round(datetime.utcnow().timestamp())) else None
     except Exception as e:
         raise AuthError(detail=str(e))
-        print(e)
-        return None
+
+
+def _revocations(request: Request) -> RevocationList | None:
+    # the app's container, which create_app keeps on app.state
+    container = getattr(request.app.state, "container", None)
+    return container.revocation_list() if container is not None else None
 
 
 class JWTBearer(HTTPBearer):
@@ -54,16 +190,16 @@ class JWTBearer(HTTPBearer):
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise AuthError(detail="Invalid authentication scheme.")
-            if not self.verify_jwt(credentials.credentials):
+            if not self.verify_jwt(credentials.credentials, _revocations(request)):
                 raise AuthError(detail="Invalid token or expired token.")
             return credentials.credentials
         else:
             raise AuthError(detail="Invalid authorization code.")
 
-    def verify_jwt(self, jwt_token: str) -> bool:
+    def verify_jwt(self, jwt_token: str, revocations: RevocationList | None = None) -> bool:
         is_token_valid: bool = False
         try:
-            payload = decode_jwt(jwt_token, validate_token=self.validate_token)
+            payload = decode_jwt(jwt_token, validate_token=self.validate_token, revocations=revocations)
         except Exception:
             payload = None
         if payload:
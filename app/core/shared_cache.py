@@ -0,0 +1,248 @@
+import bisect
+import os
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError, get_context
+from multiprocessing.connection import (
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+from multiprocessing.managers import RemoteError
+from typing import Any
+
+from loguru import logger
+
+from app.core.cache import CacheBackend, TTLCache
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitBackend
+
+
+class SharedStore:
+    # lives in the cache server process; each call from a worker is one round trip over the unix socket.
+    # The server runs a thread per connection, so everything here is guarded by the structures' own locks.
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._values = TTLCache(max_size=max_size)
+        self._counters = InMemoryRateLimitBackend(max_size=max_size)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._logs: dict[str, list[tuple[int, float, Any]]] = {}
+
+    def get(self, key: str) -> Any:
+        return self._values.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._values.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._values.delete(key)
+
+    def incr(self, key: str, ttl: float) -> int:
+        return self._counters.incr(key, ttl)
+
+    def count(self, key: str) -> int:
+        return self._counters.get(key)
+
+    def publish(self, channel: str, item: Any, ttl: float) -> None:
+        # append-only log that workers poll with updates(); entries leave it when they expire
+        now = time.monotonic()
+        with self._lock:
+            self._sequence += 1
+            log = self._logs.setdefault(channel, [])
+            log.append((self._sequence, now + ttl, item))
+            while log and (log[0][1] <= now or len(log) > self.max_size):
+                log.pop(0)
+
+    def updates(self, channel: str, cursor: int) -> tuple[int, list]:
+        # everything published after cursor, and the cursor to pass next time
+        now = time.monotonic()
+        with self._lock:
+            if cursor > self._sequence:
+                cursor = 0  # the server restarted since this worker last asked
+            log = self._logs.get(channel, [])
+            start = bisect.bisect_right(log, cursor, key=lambda entry: entry[0])
+            return self._sequence, [item for _, expires_at, item in log[start:] if expires_at > now]
+
+    def stats(self) -> dict:
+        return {**self._values.stats(), "logs": {channel: len(log) for channel, log in self._logs.items()}}
+
+
+def _check_authkey(authkey: bytes) -> None:
+    if not authkey:
+        raise ValueError("the shared cache needs a non-empty SHARED_CACHE_AUTHKEY")
+
+
+def _private_directory(address: str) -> None:
+    # the socket lives in a directory only this user can enter; refuse one that others can reach
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"shared cache directory {directory} must be owned by this user with mode 0700")
+
+
+def _serve_connection(connection: Connection, store: SharedStore, authkey: bytes) -> None:
+    # one thread per worker connection: (method, args) in, (ok, result) out
+    with connection:
+        try:
+            deliver_challenge(connection, authkey)
+            answer_challenge(connection, authkey)
+            while True:
+                method, args = connection.recv()
+                try:
+                    if method.startswith("_"):
+                        raise AttributeError(method)
+                    reply = (True, getattr(store, method)(*args))
+                except Exception as e:
+                    reply = (False, f"{type(e).__name__}: {e}")
+                connection.send(reply)
+        except (OSError, EOFError, AuthenticationError):
+            return
+
+
+def _serve(address: str, authkey: bytes, max_size: int, ready: Connection) -> None:
+    store = SharedStore(max_size)
+    with Listener(address, family="AF_UNIX") as listener:
+        ready.send(True)
+        while True:
+            connection = listener.accept()
+            threading.Thread(target=_serve_connection, args=(connection, store, authkey), daemon=True).start()
+
+
+class SharedCacheServer:
+    def __init__(self, address: str, process) -> None:
+        self.address = address
+        self.process = process
+
+    def shutdown(self) -> None:
+        self.process.terminate()
+        self.process.join()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+def start_cache_server(address: str, authkey: bytes, max_size: int) -> SharedCacheServer:
+    # called by the gunicorn master before it forks any worker; spawned, so the server holds none of the app
+    _check_authkey(authkey)
+    _private_directory(address)
+    if os.path.exists(address):
+        os.unlink(address)  # left behind by a master that did not shut down cleanly
+    context = get_context("spawn")
+    receiver, ready = context.Pipe(duplex=False)
+    process = context.Process(target=_serve, args=(address, authkey, max_size, ready), name="shared-cache", daemon=True)
+    process.start()
+    if not receiver.poll(10):
+        process.terminate()
+        raise RuntimeError(f"shared cache did not start listening on {address}")
+    receiver.recv()
+    return SharedCacheServer(address, process)
+
+
+class SharedCacheClient:
+    # one connection per process, opened on first use: a client built in the gunicorn master before fork
+    # (preload_app) is never used by a worker through the parent's socket. Calls block, so async code makes them
+    # from the threadpool or a background thread; each round trip is bounded by timeout and after a failure the
+    # server is left alone for retry_seconds.
+    def __init__(self, address: str, authkey: bytes, timeout: float = 0.1, retry_seconds: float = 1.0) -> None:
+        _check_authkey(authkey)
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._connection: Connection | None = None
+        self._pid = None
+        self._retry_at = 0.0
+        self._available = True
+
+    def _connect(self) -> Connection:
+        if self._connection is None or self._pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+            # Connection reads with os.read; the round trips are bounded by poll() from here on
+            sock.setblocking(True)
+            connection = Connection(sock.detach())
+            # the server speaks first; a hung one fails here rather than in the handshake
+            if not connection.poll(self.timeout):
+                connection.close()
+                raise TimeoutError(f"no handshake from {self.address}")
+            answer_challenge(connection, self.authkey)
+            deliver_challenge(connection, self.authkey)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def _request(self, method: str, args: tuple) -> Any:
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.send((method, args))
+                if not connection.poll(self.timeout):
+                    raise TimeoutError(f"{method} took longer than {self.timeout}s")
+                ok, result = connection.recv()
+            except (OSError, EOFError, AuthenticationError):
+                # a late reply would be read as the answer to the next call, so the connection is never reused
+                if self._connection is not None and self._pid == os.getpid():
+                    self._connection.close()
+                self._connection = None
+                raise
+        if not ok:
+            raise RemoteError(result)
+        return result
+
+    def call(self, method: str, *args, default: Any = None) -> Any:
+        # the shared state only saves work or narrows a window, so an unreachable server degrades every worker to
+        # a miss instead of failing requests; the first call after retry_seconds reconnects
+        if not self._available and time.monotonic() < self._retry_at:
+            return default
+        try:
+            result = self._request(method, args)
+        except RemoteError as e:
+            logger.warning("shared cache call {} failed: {}", method, e.args[0])
+            return default
+        except (OSError, EOFError, AuthenticationError) as e:
+            if self._available:
+                logger.warning("shared cache at {} unavailable: {}", self.address, e)
+            self._available = False
+            self._retry_at = time.monotonic() + self.retry_seconds
+            return default
+        self._available = True
+        return result
+
+
+class SharedCacheBackend(CacheBackend):
+    def __init__(self, client: SharedCacheClient) -> None:
+        self.client = client
+
+    def get(self, key: str) -> Any:
+        return self.client.call("get", key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.call("set", key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.call("delete", key)
+
+    def publish(self, channel: str, item: Any, ttl: float) -> None:
+        self.client.call("publish", channel, item, ttl)
+
+    def updates(self, channel: str, cursor: int) -> tuple[int, list]:
+        return self.client.call("updates", channel, cursor, default=(cursor, []))
+
+
+class SharedRateLimitBackend(RateLimitBackend):
+    # with the server down the counters read as zero: sign-in stays available rather than locking everyone out
+    def __init__(self, client: SharedCacheClient) -> None:
+        self.client = client
+
+    def incr(self, key: str, ttl: float) -> int:
+        return self.client.call("incr", key, ttl, default=0)
+
+    def get(self, key: str) -> int:
+        return self.client.call("count", key, default=0)
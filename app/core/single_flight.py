@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.core.database import without_request_scope
+
+
+class SingleFlight:
+    # coalesces concurrent calls with the same key onto one execution and hands its result (or error) to all of them.
+    # Keys are forgotten as soon as the call finishes, so this never serves stale results; it only removes duplicates.
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            self.calls += 1
+            # a task of its own, so a cancelled caller does not cancel the work the others are waiting for. It runs
+            # outside the first caller's request scope: that request's session may be released or closed while the
+            # others still wait, so the flight opens its own
+            call = without_request_scope().run(asyncio.ensure_future, fn(*args))
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(call)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
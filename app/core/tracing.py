@@ -0,0 +1,55 @@
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+
+from loguru import logger
+
+from app.core.config import configs
+
+LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[request_id]} | {name}:{function}:{line} - {message}"
+
+
+class RequestTrace:
+    # mutable so that sync repository calls running in the threadpool (a copied context) still add to it
+    def __init__(self, request_id: str, sampled: bool) -> None:
+        self.request_id = request_id
+        self.sampled = sampled
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def add_query(self, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+
+
+_current_trace: ContextVar[RequestTrace | None] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> RequestTrace | None:
+    return _current_trace.get()
+
+
+def start_trace(request_id: str | None = None, sample_rate: float | None = None) -> tuple[RequestTrace, object]:
+    rate = configs.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    trace = RequestTrace(request_id or uuid.uuid4().hex, random.random() < rate)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token) -> None:
+    _current_trace.reset(token)
+
+
+def _add_request_id(record) -> None:
+    trace = _current_trace.get()
+    record["extra"].setdefault("request_id", trace.request_id if trace else "-")
+
+
+# every record carries the correlation id, whichever sink it ends up in
+logger.configure(patcher=_add_request_id)
+
+
+def configure_logging() -> None:
+    # enqueue hands records to a background writer, so request handlers never block on the sink
+    logger.remove()
+    logger.add(sys.stderr, level=configs.LOG_LEVEL, format=LOG_FORMAT, serialize=configs.LOG_JSON, enqueue=True)
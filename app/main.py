@@ -1,46 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 
-from app.api.v1.routes import routers as v1_routers
 from app.core.config import configs
 from app.core.container import Container
-from app.util.class_object import singleton
+from app.core.metrics import registry
+from app.core.middleware import (
+    DatabaseSessionMiddleware,
+    MetricsMiddleware,
+    TracingMiddleware,
+)
+from app.core.tracing import configure_logging
+
+
+def create_app(container: Container | None = None) -> FastAPI:
+    # app factory: `uvicorn --factory app.main:create_app`; nothing is built at import time
+    configure_logging()
+    container = container or Container()
+    container.wire()
+    db = container.db()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # background jobs
+        purge_task = None
+        if configs.REFRESH_TOKEN_PURGE_ENABLED:
+            purge_task = asyncio.create_task(container.token_purge_service().run_forever())
+        yield
+        if purge_task:
+            purge_task.cancel()
+            # let the in-flight batch roll back and close its session before the loop goes away
+            with suppress(asyncio.CancelledError):
+                await purge_task
 
+    # set app default
+    app = FastAPI(
+        title=configs.PROJECT_NAME,
+        openapi_url=f"{configs.API}/openapi.json",
+        version="0.0.1",
+        lifespan=lifespan,
+        # orjson encodes the validated response several times faster than the stdlib json module
+        default_response_class=ORJSONResponse,
+    )
+    app.state.container = container
+    app.state.db = db
 
-@singleton
-class AppCreator:
-    def __init__(self):
-        # set app default
-        self.app = FastAPI(
-            title=configs.PROJECT_NAME,
-            openapi_url=f"{configs.API}/openapi.json",
-            version="0.0.1",
+    # share one db session per request
+    app.add_middleware(DatabaseSessionMiddleware, db=db)
+
+    # set cors; added before metrics and tracing so both wrap preflight responses too
+    if configs.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in configs.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
         )
 
-        # set db and container
-        self.container = Container()
-        self.db = self.container.db()
-        # self.db.create_database()
-
-        # set cors
-        if configs.BACKEND_CORS_ORIGINS:
-            self.app.add_middleware(
-                CORSMiddleware,
-                allow_origins=[str(origin) for origin in configs.BACKEND_CORS_ORIGINS],
-                allow_credentials=True,
-                allow_methods=["*"],
-                allow_headers=["*"],
-            )
-
-        # set routes
-        @self.app.get("/")
-        def root():
-            return "service is working"
-
-        self.app.include_router(v1_routers, prefix=configs.API_V1_STR)
-
-
-app_creator = AppCreator()
-app = app_creator.app
-db = app_creator.db
-container = app_creator.container
+    # per-route latency histograms, served at /metrics together with the pool counters and gauges
+    if configs.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        registry.register_collector("db_pool", db.pool_stats, counters=db.pool_metrics.COUNTERS)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    # correlation ids and sampled request/query logs; outermost so the id covers everything below
+    app.add_middleware(TracingMiddleware)
+
+    # set routes
+    @app.get("/")
+    def root():
+        return "service is working"
+
+    # the routers import every endpoint, schema and security module, so they load with the app, not with this module
+    from app.api.v1.routes import routers as v1_routers
+    from app.api.well_known import router as well_known_router
+
+    app.include_router(v1_routers, prefix=configs.API_V1_STR)
+    app.include_router(well_known_router)
+    return app
+
+
+_default_app: FastAPI | None = None
+
+
+def __getattr__(name: str):
+    # `uvicorn app.main:app` and `from app.main import app, db, container` keep working; the app is built on first access
+    global _default_app
+    if name not in ("app", "db", "container"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _default_app is None:
+        _default_app = create_app()
+    if name == "app":
+        return _default_app
+    return getattr(_default_app.state, name)
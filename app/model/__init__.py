@@ -1,7 +1,8 @@
 from sqlmodel import SQLModel
 
 from app.model.base_model import BaseModel
+from app.model.job_lease import JobLease
 from app.model.refresh_token import RefreshToken
 from app.model.user import User
 
-__all__ = ["BaseModel", "User", "SQLModel", "RefreshToken"]
+__all__ = ["BaseModel", "User", "SQLModel", "RefreshToken", "JobLease"]
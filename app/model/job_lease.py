@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from sqlmodel import Field
+
+from app.model import BaseModel
+
+
+class JobLease(BaseModel, table=True):
+    # one row per background job shared by every worker and pod; the holder of an unexpired lease runs the job
+    name: str = Field(max_length=64, unique=True, nullable=False)
+    holder: str = Field(max_length=255, nullable=False)
+    expires_at: datetime = Field(nullable=False)
@@ -7,7 +7,8 @@ from app.model import BaseModel
 
 
 class RefreshToken(BaseModel, table=True):
-    token: str = Field(unique=True, nullable=False)
-    user_id: uuid.UUID = Field(nullable=False)
-    expiration: datetime = Field(nullable=False)
+    # sha256 hex digest of the refresh token, the raw token is never stored
+    token_hash: str = Field(max_length=64, unique=True, index=True, nullable=False)
+    user_id: uuid.UUID = Field(nullable=False, index=True)
+    expiration: datetime = Field(nullable=False, index=True)
     last_used: datetime = Field(nullable=False)
@@ -1,9 +1,16 @@
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from app.model.base_model import BaseModel
 
 
 class User(BaseModel, table=True):
+    # cursor pages seek on (order column, id)
+    __table_args__ = (
+        Index("ix_user_updated_at_id", "updated_at", "id"),
+        Index("ix_user_created_at_id", "created_at", "id"),
+    )
+
     email: str = Field(unique=True)
     password: str = Field()
     phone_number: str = Field(default=None, nullable=True)
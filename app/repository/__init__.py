@@ -1,4 +1,18 @@
-from app.repository.refresh_token_repository import RefreshTokenRepository
-from app.repository.user_repository import UserRepository
+from app.repository.job_lease_repository import (
+    AsyncJobLeaseRepository,
+    JobLeaseRepository,
+)
+from app.repository.refresh_token_repository import (
+    AsyncRefreshTokenRepository,
+    RefreshTokenRepository,
+)
+from app.repository.user_repository import AsyncUserRepository, UserRepository
 
-__all__ = ["UserRepository", "RefreshTokenRepository"]
+__all__ = [
+    "UserRepository",
+    "RefreshTokenRepository",
+    "JobLeaseRepository",
+    "AsyncUserRepository",
+    "AsyncRefreshTokenRepository",
+    "AsyncJobLeaseRepository",
+]
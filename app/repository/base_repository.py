@@ -1,72 +1,279 @@
-from contextlib import AbstractContextManager
+import operator
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from datetime import datetime
 from typing import Callable
 
-from sqlalchemy import and_, not_, update
+from sqlalchemy import and_, func, not_, select, text, tuple_, union_all, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, joinedload
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import configs
-from app.core.exceptions import DuplicatedError, NotFoundError
+from app.core.exceptions import DuplicatedError, NotFoundError, ValidationError
+from app.schema.base_schema import CountOptions
+from app.util.cursor import cursor_value, decode_cursor, encode_cursor
 from app.util.query_builder import dict_to_sqlalchemy_filter_options
 
 
-class BaseRepository:
-    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]], model) -> None:
+class _StatementMixin:
+    # statement builders and cache helpers shared by the sync and async repositories
+    model = None
+    cache = None
+
+    def _cached(self, id: str, eager=False):
+        if eager or self.cache is None:
+            return None
+        return self.cache.get(id)
+
+    def _remember(self, instance, eager=False):
+        if not eager and self.cache is not None:
+            self.cache.set(instance)
+
+    def _forget(self, id: str):
+        if self.cache is not None:
+            self.cache.invalidate(id)
+
+    def _eager_options(self, query, eager, entity=None):
+        if eager:
+            for eager in getattr(self.model, "eagers", []):
+                query = query.options(joinedload(getattr(entity or self.model, eager)))
+        return query
+
+    def _columns(self, columns):
+        return [getattr(self.model, column) for column in columns]
+
+    def _cached_columns(self, id: str, columns: list[str]) -> dict | None:
+        data = self.cache.get_data(id) if self.cache is not None else None
+        return {column: data[column] for column in columns} if data is not None else None
+
+    def _find_statements(self, schema, eager=False, dialect=None, columns=None):
+        schema_as_dict = schema.model_dump(exclude_none=True)
+        ordering = schema_as_dict.get("ordering", configs.ORDERING)
+        order_by = schema_as_dict.get("order_by", configs.ORDER_BY)
+        page = schema_as_dict.get("page", configs.PAGE)
+        page_size = schema_as_dict.get("page_size", configs.PAGE_SIZE)
+        cursor = schema_as_dict.get("cursor")
+        count = schema_as_dict.get("count", CountOptions.exact)
+        descending = ordering == "desc"
+        filter_options = dict_to_sqlalchemy_filter_options(self.model, schema_as_dict)
+        # id and the order column are always selected, the next cursor is built from them
+        query = select(*self._columns(dict.fromkeys([*columns, "id", order_by]))) if columns else select(self.model)
+        filtered_query = query.filter(filter_options).filter(not_(self.model.is_deleted))
+        if page_size != "all" and (cursor or page == 1):
+            # one extra row tells whether there is a next page without counting
+            query = self._keyset_statement(filtered_query, order_by, descending, cursor, page_size + 1, dialect, eager, bool(columns))
+        else:
+            order_column = getattr(self.model, order_by)
+            query = filtered_query.order_by(*self._order_clauses(order_column, self.model.id, descending, dialect))
+            query = query if columns else self._eager_options(query, eager)
+            if page_size != "all":
+                query = query.offset((page - 1) * page_size).limit(page_size + 1)
+        search_options = {
+            "page": page,
+            "page_size": page_size,
+            "ordering": ordering,
+            "order_by": order_by,
+            "cursor": cursor,
+            "count": count,
+        }
+        return query, self._count_statement(filtered_query, count, dialect), search_options
+
+    @staticmethod
+    def _order_clauses(order_column, id_column, descending, dialect=None, nullable=None):
+        # id breaks ties so every row has a unique position a cursor can point at; nulls sort last
+        direction = operator.methodcaller("desc" if descending else "asc")
+        clauses = [direction(order_column), direction(id_column)]
+        if not (order_column.expression.nullable if nullable is None else nullable):
+            return clauses
+        if dialect == "mysql":
+            # MySQL has no NULLS LAST; false sorts before true
+            return [order_column.is_(None), *clauses]
+        return [clauses[0].nulls_last(), clauses[1]]
+
+    def _cursor_position(self, order_by, order_column, cursor) -> tuple:
+        values = decode_cursor(cursor)
+        if len(values) != 3 or values[0] != order_by:
+            raise ValidationError(detail="cursor does not match order_by")
+        return cursor_value(order_column, values[1]), cursor_value(self.model.id, values[2])
+
+    def _keyset_statement(self, filtered_query, order_by, descending, cursor, limit, dialect, eager, projected):
+        # every branch is a range scan of the (order column, id) index that stops after `limit` rows
+        order_column, id_column = getattr(self.model, order_by), self.model.id
+        direction = operator.methodcaller("desc" if descending else "asc")
+        after = operator.lt if descending else operator.gt
+        position = self._cursor_position(order_by, order_column, cursor) if cursor else None
+        if not order_column.expression.nullable:
+            query = filtered_query.order_by(direction(order_column), direction(id_column))
+            if position is not None:
+                query = query.filter(after(tuple_(order_column, id_column), position))
+            return (query if projected else self._eager_options(query, eager)).limit(limit)
+
+        if position is not None and position[0] is None:
+            # nulls sort last, so only the remaining null rows follow a null position
+            query = filtered_query.filter(order_column.is_(None), after(id_column, position[1])).order_by(direction(id_column))
+            return (query if projected else self._eager_options(query, eager)).limit(limit)
+
+        # rows with a value, then the null rows: each comes from its own range scan, and only the
+        # 2 * limit rows they return are merged and sorted
+        with_value = filtered_query.filter(order_column.is_not(None))
+        if position is not None:
+            with_value = with_value.filter(after(tuple_(order_column, id_column), position))
+        with_value = with_value.order_by(direction(order_column), direction(id_column)).limit(limit)
+        nulls = filtered_query.filter(order_column.is_(None)).order_by(direction(id_column)).limit(limit)
+        merged = union_all(select(with_value.subquery()), select(nulls.subquery())).subquery()
+        if projected:
+            query, source = select(*merged.c), merged.c
+        else:
+            entity = aliased(self.model, merged)
+            query, source = self._eager_options(select(entity), eager, entity), entity
+        orders = self._order_clauses(getattr(source, order_by), source.id, descending, dialect, nullable=True)
+        return query.order_by(*orders).limit(limit)
+
+    def _count_statement(self, filtered_query, count, dialect=None):
+        if count == CountOptions.none:
+            return None
+        if count == CountOptions.estimate and dialect == "postgresql":
+            # planner statistics for the whole table: O(1), but ignores filters and lags until the next ANALYZE
+            return text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(:table)").bindparams(
+                table=self.model.__tablename__
+            )
+        return select(func.count()).select_from(filtered_query.subquery())
+
+    def _page_result(self, founds, search_options, total_count, projected=False):
+        page_size = search_options["page_size"]
+        next_cursor = None
+        if page_size != "all" and len(founds) > page_size:
+            founds = founds[:page_size]
+            last = founds[-1]
+            order_by = search_options["order_by"]
+            next_cursor = encode_cursor(order_by, getattr(last, order_by), last.id)
+        if projected:
+            # plain dicts validate much faster than attribute reads off rows or entities
+            founds = [found._asdict() for found in founds]
+        return {
+            "founds": founds,
+            "search_options": {**search_options, "total_count": total_count, "next_cursor": next_cursor},
+        }
+
+    def _insert_ignore_statement(self, dialect: str, returning: str):
+        # rows that hit a unique constraint are skipped and simply missing from RETURNING.
+        # Dialect modules are imported here: loading sqlalchemy.dialects.postgresql pulls in every driver dialect
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+
+            statement = insert(self.model)
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+
+            statement = insert(self.model)
+        elif dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+
+            # no RETURNING on MySQL; _created_statement reads back which of the rows went in
+            return insert(self.model).prefix_with("IGNORE")
+        else:
+            raise NotImplementedError(f"bulk insert is not supported on {dialect}")
+        return statement.on_conflict_do_nothing().returning(getattr(self.model, returning))
+
+    def _created_statement(self, rows: list[dict], returning: str):
+        # ids are generated client-side, so the rows found under them are exactly the ones this insert created
+        return select(getattr(self.model, returning)).filter(self.model.id.in_([row["id"] for row in rows]))
+
+    def _stream_statement(self, columns: list[str], batch_size: int, schema=None, dialect=None):
+        # plain column rows, never entities; yield_per streams through a server-side cursor where the driver has one
+        query = select(*self._columns(columns)).filter(not_(self.model.is_deleted))
+        if schema is None:
+            return query.order_by(self.model.id).execution_options(yield_per=batch_size)
+        # same filters and order as read_by_options, without paging
+        schema_as_dict = schema.model_dump(exclude_none=True)
+        order_column = getattr(self.model, schema_as_dict.get("order_by", configs.ORDER_BY))
+        descending = schema_as_dict.get("ordering", configs.ORDERING) == "desc"
+        query = query.filter(dict_to_sqlalchemy_filter_options(self.model, schema_as_dict))
+        orders = self._order_clauses(order_column, self.model.id, descending, dialect)
+        return query.order_by(*orders).execution_options(yield_per=batch_size)
+
+    def _columns_by_id_statement(self, id: str, columns: list[str]):
+        return select(*self._columns(columns)).filter(and_(self.model.id == id, not_(self.model.is_deleted)))
+
+    def _by_id_statement(self, id: str, eager=False, with_deleted=False):
+        query = self._eager_options(select(self.model), eager)
+        if with_deleted:
+            return query.filter(self.model.id == id)
+        return query.filter(and_(self.model.id == id, (self.model.is_deleted.__eq__(False))))
+
+    def _soft_delete_statement(self, id: str):
+        return (
+            update(self.model)
+            .returning(self.model.id)
+            .filter(and_(self.model.id == id, not_(self.model.is_deleted)))
+            .values(
+                is_deleted=True,
+                deleted_at=datetime.utcnow(),
+            )
+        )
+
+
+class BaseRepository(_StatementMixin):
+    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]], model, cache=None) -> None:
         self.session_factory = session_factory
         self.model = model
+        self.cache = cache
 
-    def read_by_options(self, schema, eager=False):
+    def read_by_options(self, schema, eager=False, columns=None):
+        # with columns, founds are dicts of just those columns instead of entities
         with self.session_factory() as session:
-            schema_as_dict = schema.model_dump(exclude_none=True)
-            ordering = schema_as_dict.get("ordering", configs.ORDERING)
-            order_by = schema_as_dict.get("order_by", configs.ORDER_BY)
-            order_query = getattr(self.model, order_by).desc() if ordering == "desc" else getattr(self.model, order_by).asc()
-            page = schema_as_dict.get("page", configs.PAGE)
-            page_size = schema_as_dict.get("page_size", configs.PAGE_SIZE)
-            filter_options = dict_to_sqlalchemy_filter_options(self.model, schema.model_dump(exclude_none=True))
-            query = session.query(self.model)
-            if eager:
-                for eager in getattr(self.model, "eagers", []):
-                    query = query.options(joinedload(getattr(self.model, eager)))
-            filtered_query = query.filter(filter_options).filter(not_(self.model.is_deleted))
-            query = filtered_query.order_by(order_query)
-            if page_size == "all":
-                query = query.all()
-            else:
-                query = query.limit(page_size).offset((page - 1) * page_size).all()
-            total_count = filtered_query.count()
-            return {
-                "founds": query,
-                "search_options": {
-                    "page": page,
-                    "page_size": page_size,
-                    "ordering": ordering,
-                    "total_count": total_count,
-                    "order_by": order_by,
-                },
-            }
+            query, count_query, search_options = self._find_statements(schema, eager, session.get_bind().dialect.name, columns)
+            result = session.execute(query)
+            founds = result.all() if columns else result.unique().scalars().all()
+            total_count = session.execute(count_query).scalar() if count_query is not None else None
+            return self._page_result(founds, search_options, total_count, projected=bool(columns))
+
+    def read_columns_by_id(self, id: str, columns: list[str]) -> dict:
+        cached = self._cached_columns(id, columns)
+        if cached is not None:
+            return cached
+        if self.cache is not None:
+            # a full read fills the cache for the next caller
+            found = self.read_by_id(id)
+            return {column: getattr(found, column) for column in columns}
+        with self.session_factory() as session:
+            found = session.execute(self._columns_by_id_statement(id, columns)).first()
+            if not found:
+                raise NotFoundError(detail=f"not found id : {id}")
+            return found._asdict()
+
+    def stream_rows(self, columns: list[str], batch_size: int, schema=None):
+        with self.session_factory() as session:
+            result = session.execute(self._stream_statement(columns, batch_size, schema, session.get_bind().dialect.name))
+            for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+    def bulk_create(self, rows: list[dict], returning: str = "id") -> list:
+        with self.session_factory() as session:
+            dialect = session.get_bind().dialect.name
+            result = session.execute(self._insert_ignore_statement(dialect, returning), rows)
+            created = session.execute(self._created_statement(rows, returning)) if dialect == "mysql" else result
+            created = created.scalars().all()
+            session.commit()
+            return created
 
     def read_by_id_without_deleted(self, id: str, eager=False):
         with self.session_factory() as session:
-            query = session.query(self.model)
-            if eager:
-                for eager in getattr(self.model, "eagers", []):
-                    query = query.options(joinedload(getattr(self.model, eager)))
-            query = query.filter(self.model.id == id).first()
+            query = session.execute(self._by_id_statement(id, eager, with_deleted=True)).unique().scalars().first()
             if not query:
                 raise NotFoundError(detail=f"not found id : {id}")
             return query
 
     def read_by_id(self, id: str, eager=False):
+        cached = self._cached(id, eager)
+        if cached is not None:
+            return cached
         with self.session_factory() as session:
-            query = session.query(self.model)
-            if eager:
-                for eager in getattr(self.model, "eagers", []):
-                    query = query.options(joinedload(getattr(self.model, eager)))
-            query = query.filter(and_(self.model.id == id, (self.model.is_deleted.__eq__(False)))).first()
+            query = session.execute(self._by_id_statement(id, eager)).unique().scalars().first()
             if not query:
                 raise NotFoundError(detail=f"not found id : {id}")
+            self._remember(query, eager)
             return query
 
     def create(self, schema):
@@ -84,18 +291,21 @@ class BaseRepository:
         with self.session_factory() as session:
             session.query(self.model).filter(self.model.id == id).update(schema.model_dump(exclude_none=True))
             session.commit()
+            self._forget(id)
             return self.read_by_id(id)
 
     def update_attr(self, id: str, column: str, value):
         with self.session_factory() as session:
             session.query(self.model).filter(self.model.id == id).update({column: value})
             session.commit()
+            self._forget(id)
             return self.read_by_id(id)
 
     def whole_update(self, id: str, schema):
         with self.session_factory() as session:
             session.query(self.model).filter(self.model.id == id).update(schema.model_dump())
             session.commit()
+            self._forget(id)
             return self.read_by_id(id)
 
     def delete_by_id(self, id: str):
@@ -105,21 +315,133 @@ class BaseRepository:
                 raise NotFoundError(detail=f"not found id : {id}")
             session.delete(query)
             session.commit()
+            self._forget(id)
 
     def soft_delete_by_id(self, id: str):
         with self.session_factory() as session:
-            delete_query = (
-                update(self.model)
-                .returning(self.model.id)
-                .filter(and_(self.model.id == id, not_(self.model.is_deleted)))
-                .values(
-                    is_deleted=True,
-                    deleted_at=datetime.utcnow(),
-                )
-            )
-            rs = session.execute(delete_query).scalar()
+            rs = session.execute(self._soft_delete_statement(id)).scalar()
             if not rs:
                 raise NotFoundError(detail=f"not found id : {id}")
             session.commit()
+            self._forget(id)
 
             return self.read_by_id_without_deleted(id)
+
+
+class AsyncBaseRepository(_StatementMixin):
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]], model, cache=None) -> None:
+        self.session_factory = session_factory
+        self.model = model
+        self.cache = cache
+
+    async def _in_cache(self, method, *args):
+        # a shared cache backend answers over a blocking socket, so with one the cache is used from the threadpool;
+        # the local LRU alone stays on the event loop
+        if self.cache is None or self.cache.backend is None:
+            return method(*args)
+        return await run_in_threadpool(method, *args)
+
+    async def read_by_options(self, schema, eager=False, columns=None):
+        async with self.session_factory() as session:
+            query, count_query, search_options = self._find_statements(schema, eager, session.get_bind().dialect.name, columns)
+            result = await session.execute(query)
+            founds = result.all() if columns else result.unique().scalars().all()
+            total_count = (await session.execute(count_query)).scalar() if count_query is not None else None
+            return self._page_result(founds, search_options, total_count, projected=bool(columns))
+
+    async def read_columns_by_id(self, id: str, columns: list[str]) -> dict:
+        cached = await self._in_cache(self._cached_columns, id, columns)
+        if cached is not None:
+            return cached
+        if self.cache is not None:
+            found = await self.read_by_id(id)
+            return {column: getattr(found, column) for column in columns}
+        async with self.session_factory() as session:
+            found = (await session.execute(self._columns_by_id_statement(id, columns))).first()
+            if not found:
+                raise NotFoundError(detail=f"not found id : {id}")
+            return found._asdict()
+
+    async def stream_rows(self, columns: list[str], batch_size: int, schema=None):
+        async with self.session_factory() as session:
+            result = await session.stream(self._stream_statement(columns, batch_size, schema, session.get_bind().dialect.name))
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+    async def bulk_create(self, rows: list[dict], returning: str = "id") -> list:
+        async with self.session_factory() as session:
+            dialect = session.get_bind().dialect.name
+            result = await session.execute(self._insert_ignore_statement(dialect, returning), rows)
+            created = await session.execute(self._created_statement(rows, returning)) if dialect == "mysql" else result
+            created = created.scalars().all()
+            await session.commit()
+            return created
+
+    async def read_by_id_without_deleted(self, id: str, eager=False):
+        async with self.session_factory() as session:
+            query = (await session.execute(self._by_id_statement(id, eager, with_deleted=True))).unique().scalars().first()
+            if not query:
+                raise NotFoundError(detail=f"not found id : {id}")
+            return query
+
+    async def read_by_id(self, id: str, eager=False):
+        cached = await self._in_cache(self._cached, id, eager)
+        if cached is not None:
+            return cached
+        async with self.session_factory() as session:
+            query = (await session.execute(self._by_id_statement(id, eager))).unique().scalars().first()
+            if not query:
+                raise NotFoundError(detail=f"not found id : {id}")
+            await self._in_cache(self._remember, query, eager)
+            return query
+
+    async def create(self, schema):
+        async with self.session_factory() as session:
+            query = self.model(**schema.model_dump())
+            try:
+                session.add(query)
+                await session.commit()
+                await session.refresh(query)
+            except IntegrityError as e:
+                raise DuplicatedError(detail=str(e.orig))
+            return query
+
+    async def update(self, id: str, schema):
+        async with self.session_factory() as session:
+            await session.execute(update(self.model).filter(self.model.id == id).values(**schema.model_dump(exclude_none=True)))
+            await session.commit()
+            await self._in_cache(self._forget, id)
+            return await self.read_by_id(id)
+
+    async def update_attr(self, id: str, column: str, value):
+        async with self.session_factory() as session:
+            await session.execute(update(self.model).filter(self.model.id == id).values({column: value}))
+            await session.commit()
+            await self._in_cache(self._forget, id)
+            return await self.read_by_id(id)
+
+    async def whole_update(self, id: str, schema):
+        async with self.session_factory() as session:
+            await session.execute(update(self.model).filter(self.model.id == id).values(**schema.model_dump()))
+            await session.commit()
+            await self._in_cache(self._forget, id)
+            return await self.read_by_id(id)
+
+    async def delete_by_id(self, id: str):
+        async with self.session_factory() as session:
+            query = (await session.execute(select(self.model).filter(self.model.id == id))).scalars().first()
+            if not query:
+                raise NotFoundError(detail=f"not found id : {id}")
+            await session.delete(query)
+            await session.commit()
+            await self._in_cache(self._forget, id)
+
+    async def soft_delete_by_id(self, id: str):
+        async with self.session_factory() as session:
+            rs = (await session.execute(self._soft_delete_statement(id))).scalar()
+            if not rs:
+                raise NotFoundError(detail=f"not found id : {id}")
+            await session.commit()
+            await self._in_cache(self._forget, id)
+
+            return await self.read_by_id_without_deleted(id)
@@ -0,0 +1,64 @@
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.model.job_lease import JobLease
+
+
+def _renew_statement(name: str, holder: str, now: datetime, seconds: int):
+    # only the current holder can extend the lease, anyone can take it over once it has expired
+    return (
+        update(JobLease)
+        .where(JobLease.name == name, or_(JobLease.holder == holder, JobLease.expires_at < now))
+        .values(holder=holder, expires_at=now + timedelta(seconds=seconds), updated_at=now)
+    )
+
+
+class JobLeaseRepository:
+    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]]):
+        self.session_factory = session_factory
+
+    def acquire(self, name: str, holder: str, seconds: int) -> bool:
+        now = datetime.now()
+        with self.session_factory() as session:
+            if session.execute(_renew_statement(name, holder, now, seconds)).rowcount:
+                session.commit()
+                return True
+            if session.execute(select(JobLease.id).where(JobLease.name == name)).first() is not None:
+                session.rollback()
+                return False
+            # first run of the job, the unique name lets exactly one concurrent insert win
+            session.add(JobLease(name=name, holder=holder, expires_at=now + timedelta(seconds=seconds)))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return False
+            return True
+
+
+class AsyncJobLeaseRepository:
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
+        self.session_factory = session_factory
+
+    async def acquire(self, name: str, holder: str, seconds: int) -> bool:
+        now = datetime.now()
+        async with self.session_factory() as session:
+            if (await session.execute(_renew_statement(name, holder, now, seconds))).rowcount:
+                await session.commit()
+                return True
+            if (await session.execute(select(JobLease.id).where(JobLease.name == name))).first() is not None:
+                await session.rollback()
+                return False
+            session.add(JobLease(name=name, holder=holder, expires_at=now + timedelta(seconds=seconds)))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+            return True
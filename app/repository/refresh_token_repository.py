@@ -1,12 +1,48 @@
-from contextlib import AbstractContextManager
+import uuid
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from datetime import datetime, timedelta
-from typing import Callable, Type
+from typing import Callable
 
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import configs
+from app.core.exceptions import AuthError
 from app.model.refresh_token import RefreshToken
-from app.repository.base_repository import BaseRepository
+from app.repository.base_repository import AsyncBaseRepository, BaseRepository
+from app.util.hash import hash_token
+
+
+def _rotate_statement(token: str, new_token: str):
+    # the WHERE clause makes rotation a compare-and-swap: of concurrent rotations of one token only one matches
+    now = datetime.now()
+    new_token_hash = hash_token(new_token)
+    statement = (
+        update(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_token(token), RefreshToken.expiration > now)
+        .values(
+            token_hash=new_token_hash,
+            last_used=now,
+            expiration=now + timedelta(days=configs.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return statement, new_token_hash
+
+
+def _user_id_statement(token_hash: str):
+    return select(RefreshToken.user_id).filter(RefreshToken.token_hash == token_hash)
+
+
+def _active_hashes_statement(token_hashes):
+    return select(RefreshToken.token_hash).filter(RefreshToken.token_hash.in_(token_hashes), RefreshToken.expiration > datetime.now())
+
+
+def _purgeable_ids_statement(before: datetime, batch_size: int):
+    # ids are selected first because MySQL rejects LIMIT inside a DELETE ... IN subquery;
+    # the range scan and ordering both come from ix_refreshtoken_expiration
+    return select(RefreshToken.id).filter(RefreshToken.expiration < before).order_by(RefreshToken.expiration).limit(batch_size)
 
 
 class RefreshTokenRepository(BaseRepository):
@@ -14,6 +50,15 @@ class RefreshTokenRepository(BaseRepository):
         self.session_factory = session_factory
         super().__init__(session_factory, RefreshToken)
 
+    def purge_expired(self, before: datetime, batch_size: int) -> int:
+        with self.session_factory() as session:
+            ids = session.execute(_purgeable_ids_statement(before, batch_size)).scalars().all()
+            if not ids:
+                return 0
+            session.execute(delete(RefreshToken).filter(RefreshToken.id.in_(ids)))
+            session.commit()
+            return len(ids)
+
     def create(self, schema):
         with self.session_factory() as session:
             query = self.model(**schema.model_dump())
@@ -22,6 +67,10 @@ class RefreshTokenRepository(BaseRepository):
             session.refresh(query)
             return query
 
+    def read_active_hashes(self, token_hashes) -> set[str]:
+        with self.session_factory() as session:
+            return set(session.execute(_active_hashes_statement(token_hashes)).scalars().all())
+
     def delete_by_user_id(self, user_id):
         with self.session_factory() as session:
             session.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
@@ -30,24 +79,75 @@ class RefreshTokenRepository(BaseRepository):
 
     def delete_session(self, token):
         with self.session_factory() as session:
-            ss = session.query(RefreshToken).filter(RefreshToken.token == token).delete()
+            ss = session.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).delete()
             session.commit()
             if not ss:
                 raise ValueError("Token not found")
             return None
 
-    def rotate_token(self, token, new_token) -> Type[RefreshToken]:
+    def rotate_token(self, token, new_token) -> uuid.UUID:
         with self.session_factory() as session:
-            current_token = session.query(RefreshToken).filter(RefreshToken.token == token).first()
-            if not current_token:
-                raise Exception("Token not found")
+            statement, new_token_hash = _rotate_statement(token, new_token)
+            if session.get_bind().dialect.update_returning:
+                user_id = session.execute(statement.returning(RefreshToken.user_id)).scalar()
+            else:
+                rowcount = session.execute(statement).rowcount
+                user_id = session.execute(_user_id_statement(new_token_hash)).scalar() if rowcount else None
+            session.commit()
+            if not user_id:
+                raise AuthError(detail="Refresh token not found or expired")
+            return user_id
 
-            if current_token.expiration < datetime.now():
-                raise Exception("Token is expired")
 
-            current_token.token = new_token
-            current_token.last_used = datetime.now()
-            current_token.expiration = datetime.now() + timedelta(days=configs.REFRESH_TOKEN_EXPIRE_DAYS)
-            session.commit()
-            session.refresh(current_token)
-            return current_token
+class AsyncRefreshTokenRepository(AsyncBaseRepository):
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
+        self.session_factory = session_factory
+        super().__init__(session_factory, RefreshToken)
+
+    async def purge_expired(self, before: datetime, batch_size: int) -> int:
+        async with self.session_factory() as session:
+            ids = (await session.execute(_purgeable_ids_statement(before, batch_size))).scalars().all()
+            if not ids:
+                return 0
+            await session.execute(delete(RefreshToken).filter(RefreshToken.id.in_(ids)))
+            await session.commit()
+            return len(ids)
+
+    async def create(self, schema):
+        async with self.session_factory() as session:
+            query = self.model(**schema.model_dump())
+            session.add(query)
+            await session.commit()
+            await session.refresh(query)
+            return query
+
+    async def read_active_hashes(self, token_hashes) -> set[str]:
+        async with self.session_factory() as session:
+            return set((await session.execute(_active_hashes_statement(token_hashes))).scalars().all())
+
+    async def delete_by_user_id(self, user_id):
+        async with self.session_factory() as session:
+            await session.execute(delete(RefreshToken).filter(RefreshToken.user_id == user_id))
+            await session.commit()
+            return None
+
+    async def delete_session(self, token):
+        async with self.session_factory() as session:
+            ss = (await session.execute(delete(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)))).rowcount
+            await session.commit()
+            if not ss:
+                raise ValueError("Token not found")
+            return None
+
+    async def rotate_token(self, token, new_token) -> uuid.UUID:
+        async with self.session_factory() as session:
+            statement, new_token_hash = _rotate_statement(token, new_token)
+            if session.get_bind().dialect.update_returning:
+                user_id = (await session.execute(statement.returning(RefreshToken.user_id))).scalar()
+            else:
+                rowcount = (await session.execute(statement)).rowcount
+                user_id = (await session.execute(_user_id_statement(new_token_hash))).scalar() if rowcount else None
+            await session.commit()
+            if not user_id:
+                raise AuthError(detail="Refresh token not found or expired")
+            return user_id
@@ -1,31 +1,48 @@
-from contextlib import AbstractContextManager
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from typing import Callable
 
+from sqlalchemy import and_, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import ModelCache
 from app.core.exceptions import DuplicatedError
-from app.core.security import get_password_hash
 from app.model.user import User
-from app.repository.base_repository import BaseRepository
+from app.repository.base_repository import AsyncBaseRepository, BaseRepository
 from app.schema.user_schema import CreateUser
 
 
+def _replace_password_statement(id, old_hash: str, new_hash: str):
+    return update(User).filter(and_(User.id == id, User.password == old_hash)).values(password=new_hash)
+
+
 class UserRepository(BaseRepository):
-    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]]):
+    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]], cache: ModelCache | None = None):
         self.session_factory = session_factory
-        super().__init__(session_factory, User)
+        super().__init__(session_factory, User, cache)
 
     def read_by_email(self, email: str):
         with self.session_factory() as session:
             return session.query(User).filter(User.email.__eq__(email)).first()
 
+    def read_existing_emails(self, emails: list[str]) -> set[str]:
+        with self.session_factory() as session:
+            return set(session.execute(select(User.email).filter(User.email.in_(emails))).scalars().all())
+
+    def replace_password_hash(self, id, old_hash: str, new_hash: str) -> bool:
+        # conditional on the old hash, so a password changed in the meantime is never overwritten
+        with self.session_factory() as session:
+            rowcount = session.execute(_replace_password_statement(id, old_hash, new_hash)).rowcount
+            session.commit()
+            self._forget(id)
+            return rowcount == 1
+
     def delete_by_id(self, id: str):
         self.soft_delete_by_id(id)
 
     def create(self, schema: CreateUser):
         with self.session_factory() as session:
-            schema.password = get_password_hash(schema.password)
             query = self.model(**schema.model_dump())
             try:
                 session.add(query)
@@ -34,3 +51,27 @@ class UserRepository(BaseRepository):
             except IntegrityError as e:
                 raise DuplicatedError(detail=str(e.orig))
             return query
+
+
+class AsyncUserRepository(AsyncBaseRepository):
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]], cache: ModelCache | None = None):
+        self.session_factory = session_factory
+        super().__init__(session_factory, User, cache)
+
+    async def read_by_email(self, email: str):
+        async with self.session_factory() as session:
+            return (await session.execute(select(User).filter(User.email.__eq__(email)))).scalars().first()
+
+    async def read_existing_emails(self, emails: list[str]) -> set[str]:
+        async with self.session_factory() as session:
+            return set((await session.execute(select(User.email).filter(User.email.in_(emails)))).scalars().all())
+
+    async def replace_password_hash(self, id, old_hash: str, new_hash: str) -> bool:
+        async with self.session_factory() as session:
+            rowcount = (await session.execute(_replace_password_statement(id, old_hash, new_hash))).rowcount
+            await session.commit()
+            await self._in_cache(self._forget, id)
+            return rowcount == 1
+
+    async def delete_by_id(self, id: str):
+        await self.soft_delete_by_id(id)
@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from app.core.config import configs
 from app.schema.user_schema import UserResponse
 
 
@@ -31,6 +32,20 @@ class TokenPayload(BaseModel):
     jti: str
 
 
+class IntrospectRequest(BaseModel):
+    tokens: list[str] = Field(min_length=1, max_length=configs.INTROSPECT_MAX_TOKENS)
+
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    claims: dict | None = None
+    error: str | None = None
+
+
+class IntrospectResponse(BaseModel):
+    results: list[TokenIntrospection]
+
+
 class RefreshToken(BaseModel):
     refresh_token: str
     access_token: str
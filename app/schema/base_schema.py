@@ -17,6 +17,12 @@ class ListOrderOptions(str, enum.Enum):
     asc = "asc"
 
 
+class CountOptions(str, enum.Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 UPDATED_AT = "updated_at"
 
 
@@ -25,6 +31,8 @@ class PaginationQuery(BaseModel):
     page: Optional[int] = Field(default=1, ge=1)
     page_size: Optional[int] = Field(default=10, ge=1)
     order_by: Optional[str] = UPDATED_AT
+    cursor: Optional[str] = None
+    count: Optional[CountOptions] = CountOptions.exact
 
     @property
     def limit(self) -> int:
@@ -42,7 +50,8 @@ class PaginationQuery(BaseModel):
 
 
 class SearchOptions(PaginationQuery):
-    total_count: Optional[int]
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 T = TypeVar("T")
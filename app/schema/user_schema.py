@@ -19,7 +19,6 @@ class _BaseUser(BaseModel):
 
 class UserResponse(ModelBaseInfo, _BaseUser, metaclass=AllOptional):
     image_url: Optional[str] = None
-    password: str
     is_superuser: bool = False
 
 
@@ -52,5 +51,27 @@ class UpdateUser(_BaseUser, metaclass=AllOptional):
     image_url: Optional[str] = None
 
 
-class FindUser(PaginationQuery, _BaseUser, metaclass=AllOptional):
+class SearchUser(BaseModel):
+    email__startswith: Optional[str] = None
+    email__iexact: Optional[str] = None
+    email__icontains: Optional[str] = None
+    name__startswith: Optional[str] = None
+    name__icontains: Optional[str] = None
+    name__search: Optional[str] = None
+
+
+class UserImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class UserImportReport(BaseModel):
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: list[UserImportError] = []
+
+
+class FindUser(PaginationQuery, SearchUser, _BaseUser, metaclass=AllOptional):
     pass
@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import sys
+
+from app.core.config import configs
+from app.core.container import Container
+from app.services.user_service import EXPORT_COLUMNS
+from app.util.bulk_io import encode_batches, read_rows
+
+
+async def _read_file(path: str, block_size: int = 64 * 1024):
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            yield block
+
+
+async def _import(service, args) -> None:
+    report = await service.import_users(read_rows(_read_file(args.file), args.format), args.chunk_size)
+    for error in report.errors:
+        print(f"line {error.line}: {error.email or '-'}: {error.error}", file=sys.stderr)
+    print(f"{report.created} created, {report.failed} failed of {report.total}")
+
+
+async def _export(service, args) -> None:
+    async for chunk in encode_batches(service.export_users(args.batch_size), args.format, EXPORT_COLUMNS):
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import users from, or export them to, NDJSON or CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="create users from FILE; existing emails are reported and skipped")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    import_parser.add_argument("--chunk-size", type=int, default=configs.BULK_IMPORT_CHUNK_SIZE)
+    export_parser = commands.add_parser("export", help="write every active user to stdout")
+    export_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export_parser.add_argument("--batch-size", type=int, default=configs.BULK_EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    service = Container().user_service()
+    asyncio.run(_import(service, args) if args.command == "import" else _export(service, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import argparse
+
+from app.core.config import configs
+from app.core.security import calibrate_bcrypt_rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the bcrypt cost that verifies a password within a latency budget on this machine")
+    parser.add_argument("--target-ms", type=float, default=configs.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds, timings = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds, args.samples)
+    for cost, ms in timings.items():
+        print(f"rounds={cost:<3} verify={ms:8.1f}ms{'  <= target' if ms <= args.target_ms else ''}")
+    # run it on the production instance type: the result only holds for the CPU it was measured on
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
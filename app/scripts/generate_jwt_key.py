@@ -0,0 +1,38 @@
+import argparse
+import os
+from datetime import datetime
+
+import rsa
+
+from app.core.config import configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add an RS256 signing key to the JWT key ring or retire an old one")
+    parser.add_argument("--kid", default=datetime.utcnow().strftime("%Y%m%d%H%M%S"))
+    parser.add_argument("--bits", type=int, default=2048)
+    parser.add_argument("--retire", metavar="KID", help="keep only the public half so the key verifies but no longer signs")
+    parser.add_argument("--directory", default=configs.JWT_KEYS_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    if args.retire:
+        private_path = os.path.join(args.directory, f"{args.retire}.pem")
+        with open(private_path, "rb") as file:
+            private_key = rsa.PrivateKey.load_pkcs1(file.read())
+        public_key = rsa.PublicKey(private_key.n, private_key.e)
+        with open(os.path.join(args.directory, f"{args.retire}.pub.pem"), "wb") as file:
+            file.write(public_key.save_pkcs1())
+        os.remove(private_path)
+        print(f"retired {args.retire}")
+        return
+
+    _, private_key = rsa.newkeys(args.bits)
+    path = os.path.join(args.directory, f"{args.kid}.pem")
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as file:
+        file.write(private_key.save_pkcs1())
+    print(f"created {path}")
+
+
+if __name__ == "__main__":
+    main()
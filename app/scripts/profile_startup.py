@@ -0,0 +1,60 @@
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+# runs in a fresh interpreter so nothing is already imported; phases go to stdout, -X importtime writes to stderr
+PHASES = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app = app.main.create_app()
+created = time.perf_counter()
+app.state.db.engine
+engine = time.perf_counter()
+print(json.dumps({"import app.main": imported - started, "create_app()": created - imported, "first engine use": engine - created}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    # "import time: self [us] | cumulative | imported package" lines
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where cold start time goes: startup phases and the slowest imports")
+    parser.add_argument("--top", type=int, default=20, help="number of modules to list")
+    args = parser.parse_args()
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PHASES], capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+
+    print("phase                      ms")
+    for phase, seconds in phases.items():
+        print(f"{phase:<22} {seconds * 1000:8.1f}")
+
+    by_package = defaultdict(int)
+    for name, own, _ in modules:
+        by_package[name.split(".")[0]] += own
+    print(f"\n{'package':<30} {'self ms':>8}")
+    for package, own in sorted(by_package.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{package:<30} {own / 1000:8.1f}")
+
+    print(f"\n{'module':<50} {'self ms':>8} {'cumulative ms':>14}")
+    for name, own, cumulative in sorted(modules, key=lambda module: -module[1])[: args.top]:
+        print(f"{name:<50} {own / 1000:8.1f} {cumulative / 1000:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
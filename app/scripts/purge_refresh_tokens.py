@@ -0,0 +1,20 @@
+import argparse
+import asyncio
+
+from app.core.container import Container
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired refresh tokens in batches")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    container = Container()
+    service = container.token_purge_service()
+    if args.batch_size:
+        service.batch_size = args.batch_size
+    asyncio.run(service.purge_expired())
+
+
+if __name__ == "__main__":
+    main()
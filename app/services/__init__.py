@@ -1,4 +1,5 @@
 from app.services.auth_service import AuthService
+from app.services.token_purge_service import TokenPurgeService
 from app.services.user_service import UserService
 
-__all__ = ["AuthService", "UserService"]
+__all__ = ["AuthService", "UserService", "TokenPurgeService"]
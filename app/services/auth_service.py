@@ -1,43 +1,111 @@
 from datetime import datetime, timedelta
 
+from fastapi import BackgroundTasks
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
 from app.core.config import configs
-from app.core.exceptions import AuthError
-from app.core.security import create_jwt_token, get_password_hash, verify_password
+from app.core.exceptions import AuthError, ServiceUnavailableError
+from app.core.rate_limit import LoginRateLimiter
+from app.core.revocation import RevocationList
+from app.core.security import (
+    create_jwt_token,
+    decode_jwt,
+    get_password_hash_async,
+    password_needs_rehash,
+    revoke_token,
+    revoked_tokens,
+    verify_password_async,
+)
+from app.core.single_flight import SingleFlight
 from app.model.refresh_token import RefreshToken
 from app.model.user import User
 from app.repository.refresh_token_repository import RefreshTokenRepository
 from app.repository.user_repository import UserRepository
-from app.schema.auth_schema import AuthResponse, SignIn, SignUp
+from app.schema.auth_schema import (
+    AuthResponse,
+    IntrospectResponse,
+    SignIn,
+    SignUp,
+    TokenIntrospection,
+    TokenPayload,
+)
 from app.schema.base_schema import Blank
 from app.services.base_service import BaseService
+from app.services.user_service import RESPONSE_COLUMNS
+from app.util.hash import hash_token
+
+
+def _introspect_claims(token: str, revocations: RevocationList) -> tuple[dict | None, str | None]:
+    try:
+        claims = decode_jwt(token, validate_token=True, revocations=revocations)
+        if claims.get("token_type") == "access":
+            TokenPayload(**claims)
+        elif claims.get("token_type") != "refresh":
+            return None, "Unknown token type"
+        return claims, None
+    except AuthError as e:
+        return None, e.detail
+    except ValidationError:
+        return None, "Malformed token claims"
+
+
+def _introspect_all(tokens, revocations: RevocationList) -> dict:
+    return {token: _introspect_claims(token, revocations) for token in tokens}
 
 
 class AuthService(BaseService):
-    def __init__(self, user_repository: UserRepository, refresh_token_repository: RefreshTokenRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        refresh_token_repository: RefreshTokenRepository,
+        login_rate_limiter: LoginRateLimiter | None = None,
+        single_flight: SingleFlight | None = None,
+        refresh_grace_cache: TTLCache | None = None,
+        revocation_list: RevocationList | None = None,
+    ):
         self.user_repository = user_repository
         self.refresh_token_repository = refresh_token_repository
+        self.login_rate_limiter = login_rate_limiter
+        self.single_flight = single_flight or SingleFlight()
+        self.refresh_grace_cache = refresh_grace_cache or TTLCache(
+            max_size=configs.REFRESH_TOKEN_GRACE_MAX_SIZE, ttl=configs.REFRESH_TOKEN_GRACE_SECONDS
+        )
+        self.revocation_list = revoked_tokens if revocation_list is None else revocation_list
         super().__init__(user_repository)
 
-    def sign_in(self, sign_in_info: SignIn):
-        user: User = self.user_repository.read_by_email(sign_in_info.email)
+    async def sign_in(self, sign_in_info: SignIn, background_tasks: BackgroundTasks | None = None, client_ip: str | None = None):
+        # the limiter, the refresh grace cache and revocations can sit on the shared cache server, whose round trips
+        # block; like sync repositories they run in the threadpool
+        if self.login_rate_limiter is not None:
+            await run_in_threadpool(self.login_rate_limiter.check, sign_in_info.email, client_ip)
+        user: User = await self._call(self.user_repository.read_by_email, sign_in_info.email)
         if not user:
             raise AuthError(detail="Incorrect email or password")
         if not user.is_active:
             raise AuthError(detail="Account is not active")
-        if not verify_password(sign_in_info.password, user.password):
+        if not await verify_password_async(sign_in_info.password, user.password):
             raise AuthError(detail="Incorrect email or password")
+        if configs.PASSWORD_REHASH_ON_LOGIN and password_needs_rehash(user.password):
+            # the plain password is only available now; hashing it again after the response keeps sign-in latency flat
+            if background_tasks is not None:
+                background_tasks.add_task(self.rehash_password, user.id, user.password, sign_in_info.password)
+            else:
+                await self.rehash_password(user.id, user.password, sign_in_info.password)
         refresh_token_lifespan = timedelta(days=configs.REFRESH_TOKEN_EXPIRE_DAYS)
         refresh_token, expiration_datetime = create_jwt_token({"token_type": "refresh"}, refresh_token_lifespan)
 
-        self.refresh_token_repository.create(
+        await self._call(
+            self.refresh_token_repository.create,
             RefreshToken(
                 user_id=user.id,
-                token=refresh_token,
+                token_hash=hash_token(refresh_token),
                 updated_at=datetime.now(),
                 created_at=datetime.now(),
                 expiration=datetime.now() + timedelta(days=configs.REFRESH_TOKEN_EXPIRE_DAYS),
                 last_used=datetime.now(),
-            )
+            ),
         )
 
         access_token_lifespan = timedelta(minutes=configs.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -48,18 +116,59 @@ class AuthService(BaseService):
             refresh_token=refresh_token,
         )
 
-    def sign_out(self, refresh_token: str):
-        self.refresh_token_repository.delete_session(refresh_token)
+    async def rehash_password(self, user_id, old_hash: str, password: str) -> bool:
+        try:
+            new_hash = await get_password_hash_async(password)
+        except ServiceUnavailableError:
+            # under peak load the upgrade simply waits for a later sign-in
+            return False
+        return await self._call(self.user_repository.replace_password_hash, user_id, old_hash, new_hash)
+
+    async def sign_out(self, refresh_token: str, access_token: str | None = None):
+        await self._call(self.refresh_token_repository.delete_session, refresh_token)
+        # the access token would otherwise stay valid until it expires
+        if access_token:
+            await run_in_threadpool(revoke_token, access_token, self.revocation_list)
         return Blank()
 
-    def refresh_token(self, refresh_token: str):
+    async def refresh_token(self, refresh_token: str):
+        # parallel calls with one token share a single rotation; later retries within the grace window get its result
+        token_hash = hash_token(refresh_token)
+        reissued = await run_in_threadpool(self.refresh_grace_cache.get, token_hash)
+        if reissued is not None:
+            return reissued
+        return await self.single_flight.do(("refresh", token_hash), self._rotate_refresh_token, refresh_token, token_hash)
+
+    async def _rotate_refresh_token(self, refresh_token: str, token_hash: str) -> AuthResponse:
         new_token_lifespan = timedelta(days=configs.REFRESH_TOKEN_EXPIRE_DAYS)
         new_token, expiration_datetime = create_jwt_token({"token_type": "refresh"}, new_token_lifespan)
-        current_token = self.refresh_token_repository.rotate_token(refresh_token, new_token)
-        access_token, expiration_datetime = create_jwt_token({"subject": current_token.user_id.__str__(), "token_type": "access"})
-        return AuthResponse(access_token=access_token, expiration=expiration_datetime, refresh_token=current_token.token)
+        user_id = await self._call(self.refresh_token_repository.rotate_token, refresh_token, new_token)
+        access_token, expiration_datetime = create_jwt_token({"subject": user_id.__str__(), "token_type": "access"})
+        response = AuthResponse(access_token=access_token, expiration=expiration_datetime, refresh_token=new_token)
+        await run_in_threadpool(self.refresh_grace_cache.set, token_hash, response)
+        return response
+
+    async def introspect(self, tokens: list[str]) -> IntrospectResponse:
+        # one threadpool hop verifies the whole batch (cached claims make repeats cheap),
+        # then a single query checks which refresh tokens are still stored
+        introspected = await run_in_threadpool(_introspect_all, set(tokens), self.revocation_list)
+        refresh_hashes = {
+            hash_token(token): token for token, (claims, _) in introspected.items() if claims and claims["token_type"] == "refresh"
+        }
+        if refresh_hashes:
+            active_hashes = await self._call(self.refresh_token_repository.read_active_hashes, list(refresh_hashes))
+            for token_hash, token in refresh_hashes.items():
+                if token_hash not in active_hashes:
+                    introspected[token] = (None, "Token has been revoked")
+
+        results = []
+        for token in tokens:
+            claims, error = introspected[token]
+            results.append(TokenIntrospection(active=claims is not None, claims=claims, error=error))
+        return IntrospectResponse(results=results)
 
-    def sign_up(self, user_info: SignUp):
+    async def sign_up(self, user_info: SignUp):
+        user_info.password = await get_password_hash_async(user_info.password)
         user = User(
             **user_info.model_dump(exclude_none=True),
             is_active=True,
@@ -67,7 +176,7 @@ class AuthService(BaseService):
             updated_at=datetime.now(),
             created_at=datetime.now(),
         )
-        return self.user_repository.create(user)
+        return await self._call(self.user_repository.create, user)
 
-    def get_me(self, user_id: str):
-        return self.user_repository.read_by_id(user_id)
+    async def get_me(self, user_id: str):
+        return await self.single_flight.do(("me", user_id), self._call, self.user_repository.read_columns_by_id, user_id, RESPONSE_COLUMNS)
@@ -1,24 +1,50 @@
+import inspect
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.core.metrics import repository_duration
+
+
 class BaseService:
     def __init__(self, repository) -> None:
         self._repository = repository
 
-    def get_list(self, schema):
-        return self._repository.read_by_options(schema)
+    async def _call(self, method, *args, **kwargs):
+        # async repositories are awaited natively, sync ones are moved off the event loop
+        with repository_duration.time(repository=type(getattr(method, "__self__", None)).__name__, method=method.__name__):
+            if inspect.iscoroutinefunction(method):
+                return await method(*args, **kwargs)
+            return await run_in_threadpool(method, *args, **kwargs)
+
+    def _stream(self, method, *args, **kwargs):
+        # async generators are consumed natively, sync ones are advanced in the threadpool
+        if inspect.isasyncgenfunction(method):
+            return method(*args, **kwargs)
+        return iterate_in_threadpool(method(*args, **kwargs))
+
+    async def get_list(self, schema, columns: list[str] | None = None):
+        return await self._call(self._repository.read_by_options, schema, columns=columns)
+
+    def stream_list(self, schema, columns: list[str], batch_size: int):
+        return self._stream(self._repository.stream_rows, columns, batch_size, schema)
+
+    async def get_by_id(self, id: str):
+        return await self._call(self._repository.read_by_id, id)
 
-    def get_by_id(self, id: str):
-        return self._repository.read_by_id(id)
+    async def get_columns_by_id(self, id: str, columns: list[str]) -> dict:
+        return await self._call(self._repository.read_columns_by_id, id, columns)
 
-    def add(self, schema):
-        return self._repository.create(schema)
+    async def add(self, schema):
+        return await self._call(self._repository.create, schema)
 
-    def patch(self, id: str, schema):
-        return self._repository.update(id, schema)
+    async def patch(self, id: str, schema):
+        return await self._call(self._repository.update, id, schema)
 
-    def patch_attr(self, id: str, attr: str, value):
-        return self._repository.update_attr(id, attr, value)
+    async def patch_attr(self, id: str, attr: str, value):
+        return await self._call(self._repository.update_attr, id, attr, value)
 
-    def put_update(self, id: str, schema):
-        return self._repository.whole_update(id, schema)
+    async def put_update(self, id: str, schema):
+        return await self._call(self._repository.whole_update, id, schema)
 
-    def remove_by_id(self, id):
-        return self._repository.delete_by_id(id)
+    async def remove_by_id(self, id):
+        return await self._call(self._repository.delete_by_id, id)
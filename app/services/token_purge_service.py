@@ -0,0 +1,80 @@
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+
+from loguru import logger
+
+from app.repository.job_lease_repository import JobLeaseRepository
+from app.repository.refresh_token_repository import RefreshTokenRepository
+from app.services.base_service import BaseService
+
+
+class TokenPurgeService(BaseService):
+    LEASE_NAME = "refresh_token_purge"
+
+    def __init__(
+        self,
+        refresh_token_repository: RefreshTokenRepository,
+        batch_size: int,
+        interval: int,
+        lease_repository: JobLeaseRepository | None = None,
+    ):
+        self.refresh_token_repository = refresh_token_repository
+        self.lease_repository = lease_repository
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.interval = interval
+        self.runs = 0
+        self.purged_total = 0
+        self.seconds_total = 0.0
+        self.last_purged = 0
+        self.last_seconds = 0.0
+        super().__init__(refresh_token_repository)
+
+    async def purge_expired(self) -> dict:
+        started = time.perf_counter()
+        before = datetime.now()
+        purged = 0
+        while True:
+            deleted = await self._call(self.refresh_token_repository.purge_expired, before, self.batch_size)
+            purged += deleted
+            if deleted < self.batch_size:
+                break
+            # let request handlers run between batches
+            await asyncio.sleep(0)
+        seconds = time.perf_counter() - started
+
+        self.runs += 1
+        self.purged_total += purged
+        self.seconds_total += seconds
+        self.last_purged = purged
+        self.last_seconds = seconds
+        logger.info("purged {} expired refresh tokens in {:.3f}s", purged, seconds)
+        return {"purged": purged, "seconds": seconds}
+
+    async def take_lease(self) -> bool:
+        # every worker of every pod runs this loop, the lease row in the database picks the one that purges;
+        # it outlives a round so the holder keeps renewing it and only takes over from a worker that stopped
+        if self.lease_repository is None:
+            return True
+        return await self._call(self.lease_repository.acquire, self.LEASE_NAME, self.holder, 2 * self.interval)
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                if await self.take_lease():
+                    await self.purge_expired()
+            except Exception:
+                logger.exception("refresh token purge failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "purged_total": self.purged_total,
+            "seconds_total": self.seconds_total,
+            "last_purged": self.last_purged,
+            "last_seconds": self.last_seconds,
+        }
@@ -1,8 +1,79 @@
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from app.core.security import get_password_hash_async, get_password_hashes_async
+from app.model.user import User
 from app.repository.user_repository import UserRepository
+from app.schema.user_schema import (
+    CreateUser,
+    UserImportError,
+    UserImportReport,
+    UserResponse,
+)
 from app.services.base_service import BaseService
+from app.util.schema import response_columns
+
+RESPONSE_COLUMNS = response_columns(User, UserResponse)
+EXPORT_COLUMNS = ["id", "email", "name", "phone_number", "image_url", "is_active", "is_superuser", "created_at", "updated_at"]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors())
 
 
 class UserService(BaseService):
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
         super().__init__(user_repository)
+
+    async def add(self, schema):
+        schema.password = await get_password_hash_async(schema.password)
+        return await self._call(self.user_repository.create, schema)
+
+    async def import_users(self, rows: AsyncIterator[tuple[int, dict | None, str | None]], chunk_size: int) -> UserImportReport:
+        # rows come from app.util.bulk_io readers; only one chunk of validated users is held at a time
+        report = UserImportReport()
+        seen, chunk = set(), []
+        async for line, row, error in rows:
+            report.total += 1
+            if error is None:
+                try:
+                    user = CreateUser(**row)
+                except ValidationError as e:
+                    error = _validation_message(e)
+                else:
+                    if not user.password:
+                        error = "password is required"
+                    elif user.email in seen:
+                        error = "duplicate email in file"
+            if error is not None:
+                report.errors.append(UserImportError(line=line, email=(row or {}).get("email"), error=error))
+                continue
+            seen.add(user.email)
+            chunk.append((line, user))
+            if len(chunk) >= chunk_size:
+                await self._import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            await self._import_chunk(chunk, report)
+        report.errors.sort(key=lambda error: error.line)
+        report.failed = len(report.errors)
+        return report
+
+    async def _import_chunk(self, chunk: list[tuple[int, CreateUser]], report: UserImportReport) -> None:
+        # skip bcrypt for emails that are already taken; ON CONFLICT DO NOTHING still covers concurrent inserts
+        existing = await self._call(self.user_repository.read_existing_emails, [user.email for _, user in chunk])
+        pending = [(line, user) for line, user in chunk if user.email not in existing]
+        hashes = await get_password_hashes_async([user.password for _, user in pending])
+        rows = [
+            User(**{**user.model_dump(exclude_none=True), "password": hashed}).model_dump() for (_, user), hashed in zip(pending, hashes)
+        ]
+        created = set(await self._call(self.user_repository.bulk_create, rows, "email")) if rows else set()
+        report.created += len(created)
+        for line, user in chunk:
+            if user.email not in created:
+                report.errors.append(UserImportError(line=line, email=user.email, error="email already exists"))
+
+    def export_users(self, batch_size: int) -> AsyncIterator[list[dict]]:
+        return self._stream(self.user_repository.stream_rows, EXPORT_COLUMNS, batch_size)
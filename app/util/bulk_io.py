@@ -0,0 +1,105 @@
+import codecs
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Iterable
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv", "json": "application/json"}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # re-splits an arbitrary byte stream into text lines without holding more than one partial line
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def read_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+async def read_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    # one record per line: quoted fields must not contain newlines
+    header = None
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        # empty cells mean "not provided" so schema defaults apply
+        yield line_number, {name: value for name, value in zip(header, values) if value != ""}, None
+
+
+def read_rows(chunks: AsyncIterator[bytes], format: str):
+    return read_csv(chunks) if format == "csv" else read_ndjson(chunks)
+
+
+def _default(value):
+    # same wire format as the pydantic responses: ISO dates, UUIDs as strings
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _json(row: dict) -> str:
+    return json.dumps(row, default=_default, separators=(",", ":"))
+
+
+def _ndjson(rows: Iterable[dict]) -> bytes:
+    return "".join(_json(row) + "\n" for row in rows).encode()
+
+
+def _csv(rows: Iterable[dict], columns: list[str], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _json_array(batches: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    separator = "["
+    async for rows in batches:
+        if rows:
+            yield (separator + ",".join(_json(row) for row in rows)).encode()
+            separator = ","
+    yield b"[]" if separator == "[" else b"]"
+
+
+async def encode_batches(batches: AsyncIterator[list[dict]], format: str, columns: list[str]) -> AsyncIterator[bytes]:
+    # one write per fetched batch keeps syscalls low while memory stays at one batch
+    if format == "json":
+        async for chunk in _json_array(batches):
+            yield chunk
+        return
+    if format == "csv":
+        yield _csv([], columns, header=True)
+    async for rows in batches:
+        yield _csv(rows, columns) if format == "csv" else _ndjson(rows)
@@ -0,0 +1,36 @@
+import base64
+import json
+
+from pydantic import TypeAdapter
+
+from app.core.exceptions import ValidationError
+
+
+def encode_cursor(*values) -> str:
+    payload = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except ValueError:
+        raise ValidationError(detail="invalid cursor")
+    if not isinstance(values, list):
+        raise ValidationError(detail="invalid cursor")
+    return values
+
+
+def cursor_value(column, value):
+    # JSON flattens datetimes and UUIDs to strings; restore the column's python type for the bind
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        return TypeAdapter(python_type).validate_python(value)
+    except ValueError:
+        raise ValidationError(detail="invalid cursor")
@@ -1,5 +1,10 @@
+import hashlib
 import uuid
 
 
 def get_rand_hash(length=16):
     return uuid.uuid4().hex[:length]
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -1,4 +1,48 @@
-from sqlalchemy.sql.expression import and_
+import re
+
+from sqlalchemy import Boolean, false, func, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement, and_
+
+# must match the configuration used by the to_tsvector index expressions in the migrations
+TEXT_SEARCH_CONFIG = "simple"
+
+
+class text_search(FunctionElement):
+    # every search word must start a word of the column, case-insensitively: a GIN-indexable prefix tsquery on
+    # Postgres, LIKE on each word boundary elsewhere. Words are runs of letters, digits and "_"; outside Postgres
+    # only whitespace separates the column's words, so "smith-jones" does not match "jones" there.
+    type = Boolean()
+    name = "text_search"
+    inherit_cache = True
+
+    def __init__(self, column, value):
+        words = [word.lower() for word in re.findall(r"\w+", value)]
+        patterns = []
+        for word in words:
+            escaped = word.replace("/", "//").replace("%", "/%").replace("_", "/_")
+            patterns += [f"{escaped}%", f"% {escaped}%"]
+        super().__init__(column, " & ".join(f"{word}:*" for word in words), *patterns)
+
+
+@compiles(text_search)
+def _compile_text_search(element, compiler, **kw):
+    column, _, *patterns = list(element.clauses)
+    if not patterns:
+        return compiler.process(false(), **kw)
+    value = func.lower(column)
+    words = [or_(value.like(start, escape="/"), value.like(inner, escape="/")) for start, inner in zip(patterns[::2], patterns[1::2])]
+    return compiler.process(and_(*words), **kw)
+
+
+@compiles(text_search, "postgresql")
+def _compile_text_search_postgresql(element, compiler, **kw):
+    column, query, *patterns = list(element.clauses)
+    if not patterns:
+        return compiler.process(false(), **kw)
+    document = func.to_tsvector(TEXT_SEARCH_CONFIG, func.coalesce(column, ""))
+    return compiler.process(document.op("@@")(func.to_tsquery(TEXT_SEARCH_CONFIG, query)), **kw)
+
 
 SQLALCHEMY_QUERY_MAPPER = {
     "eq": "__eq__",
@@ -9,6 +53,15 @@ SQLALCHEMY_QUERY_MAPPER = {
     "gte": "__ge__",
 }
 
+# string operators that can use an index: prefix LIKE (B-tree pattern ops), lower() equality,
+# ILIKE substring (pg_trgm GIN) and word-prefix search (tsvector GIN)
+SQLALCHEMY_TEXT_QUERY_MAPPER = {
+    "startswith": lambda attr, value: attr.startswith(value, autoescape=True),
+    "iexact": lambda attr, value: func.lower(attr) == value.lower(),
+    "icontains": lambda attr, value: attr.icontains(value, autoescape=True),
+    "search": lambda attr, value: text_search(attr, value),
+}
+
 
 def dict_to_sqlalchemy_filter_options(model_class, search_option_dict):
     sql_alchemy_filter_options = []
@@ -35,6 +88,8 @@ def dict_to_sqlalchemy_filter_options(model_class, search_option_dict):
         option_from_dict = copied_dict[custom_option]
         if command == "in":
             sql_alchemy_filter_options.append(attr.in_([option.strip() for option in option_from_dict.split(",")]))
+        elif command in SQLALCHEMY_TEXT_QUERY_MAPPER.keys():
+            sql_alchemy_filter_options.append(SQLALCHEMY_TEXT_QUERY_MAPPER[command](attr, option_from_dict))
         elif command in SQLALCHEMY_QUERY_MAPPER.keys():
             sql_alchemy_filter_options.append(getattr(attr, SQLALCHEMY_QUERY_MAPPER[command])(option_from_dict))
         elif command == "isnull":
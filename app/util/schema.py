@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional
 
 from pydantic._internal._model_construction import ModelMetaclass
@@ -14,3 +15,9 @@ class AllOptional(ModelMetaclass):
                 namespaces[field] = None
         namespaces["__annotations__"] = annotations
         return super().__new__(cls, name, bases, namespaces, **kwargs)
+
+
+@lru_cache
+def response_columns(model, schema) -> tuple[str, ...]:
+    # the model columns a response schema reads, for projected queries
+    return tuple(name for name in schema.model_fields if name in model.__table__.columns)
@@ -0,0 +1,6 @@
+import os
+
+# Configs requires database settings at import time; benchmarks never reach a real server
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("DB_HOST", "localhost")
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("sign-in", "refresh", "me", "user-list")
+PASSWORD = "benchmark-password"
+
+
+def configure_environment():
+    # Configs reads the environment at import time, so this has to run before anything from app is imported
+    os.environ.setdefault("DB_USER", "bench")
+    os.environ.setdefault("DB_PASSWORD", "bench")
+    os.environ.setdefault("DB_HOST", "localhost")
+    # every simulated client signs in as the same few accounts from one address
+    os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+    if "DATABASE_URI" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="auth-bench-"), "bench.db")
+        os.environ["DATABASE_URI"] = f"sqlite:///{path}"
+        os.environ["ASYNC_DATABASE_URI"] = f"sqlite+aiosqlite:///{path}"
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def sign_in(client, email):
+    response = await client.post("/api/v1/auth/sign-in", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()
+
+
+async def seed(client, container, users):
+    emails = [f"bench{index}@bench.com" for index in range(users)]
+    for email in emails:
+        payload = {"email": email, "password": PASSWORD, "name": "bench", "phone_number": "0"}
+        response = await client.post("/api/v1/auth/sign-up", json=payload)
+        response.raise_for_status()
+    # the admin listing needs a super user
+    admin = (await client.post("/api/v1/auth/sign-in", json={"email": emails[0], "password": PASSWORD})).json()
+    me = (await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {admin['access_token']}"})).json()
+    await container.user_service().patch_attr(me["id"], "is_superuser", True)
+    return emails
+
+
+async def run_scenario(client, scenario, emails, requests, concurrency):
+    latencies, errors = [], 0
+    remaining = requests
+    # every worker signs in once outside the measured window; refresh tokens rotate, so each worker keeps its own chain
+    sessions = [await sign_in(client, emails[0]) for _ in range(concurrency)] if scenario != "sign-in" else [None] * concurrency
+
+    async def send(session, index):
+        if scenario == "sign-in":
+            return await client.post("/api/v1/auth/sign-in", json={"email": emails[index % len(emails)], "password": PASSWORD})
+        if scenario == "refresh":
+            return await client.get("/api/v1/auth/refresh-token", params={"token": session["refresh_token"]})
+        headers = {"Authorization": f"Bearer {session['access_token']}"}
+        if scenario == "me":
+            return await client.get("/api/v1/auth/me", headers=headers)
+        return await client.get("/api/v1/user", params={"page_size": 20}, headers=headers)
+
+    async def worker(session):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await send(session, remaining)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            elif scenario == "refresh":
+                session.update(response.json())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(session) for session in sessions))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: {result['rps']} req/s vs baseline {base['rps']} req/s")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for scenario, result in results.items():
+        print(
+            f"{scenario:<12}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10}"
+            f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+        )
+
+
+async def run(args):
+    import httpx
+
+    from app.main import app, container, db
+
+    if inspect.iscoroutinefunction(db.create_database):
+        await db.create_database()
+    else:
+        db.create_database()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        emails = await seed(client, container, args.users)
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = await run_scenario(client, scenario, emails, args.requests, args.concurrency)
+    results["pool"] = db.pool_stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the auth endpoints in-process and report latency percentiles")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail when p95 or req/s regress past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    configure_environment()
+    results = asyncio.run(run(args))
+    pool = results.pop("pool")
+    print_table(results)
+    print(f"pool: {pool}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
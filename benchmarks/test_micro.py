@@ -0,0 +1,108 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import json_response
+from app.core.security import (
+    create_jwt_token,
+    decode_jwt,
+    get_password_hash,
+    revoked_tokens,
+    verified_token_cache,
+    verify_jwt_claims,
+    verify_password,
+)
+from app.model.user import User
+from app.schema.auth_schema import AuthResponse
+from app.schema.base_schema import FindResult
+from app.schema.user_schema import UserResponse
+from app.util.query_builder import dict_to_sqlalchemy_filter_options
+
+FILTERS = {
+    "email__startswith": "driver",
+    "name": "ev",
+    "is_active": True,
+    "created_at__gte": "2024-01-01",
+    "id__in": "a, b, c",
+}
+
+
+@pytest.fixture(scope="module")
+def token():
+    return create_jwt_token({"subject": "00000000-0000-0000-0000-000000000000", "token_type": "access"})[0]
+
+
+@pytest.fixture(scope="module")
+def password_hash():
+    return get_password_hash("benchmark-password")
+
+
+def test_create_jwt_token(benchmark):
+    benchmark(create_jwt_token, {"subject": "00000000-0000-0000-0000-000000000000", "token_type": "access"})
+
+
+def test_decode_jwt_cached(benchmark, token):
+    decode_jwt(token, validate_token=True)
+    benchmark(decode_jwt, token, validate_token=True)
+
+
+def test_verify_jwt_claims_uncached(benchmark, token):
+    def verify():
+        verified_token_cache.clear()
+        return verify_jwt_claims(token)
+
+    benchmark(verify)
+
+
+def test_revocation_check_miss(benchmark):
+    # the common case: the jti was never revoked and the bloom filter answers alone
+    benchmark(revoked_tokens.is_revoked, "00000000-0000-0000-0000-000000000001")
+
+
+def test_verify_password(benchmark, password_hash):
+    # bcrypt is deliberately slow; a few rounds are enough to see a cost factor change
+    benchmark.pedantic(verify_password, args=("benchmark-password", password_hash), rounds=5, iterations=1)
+
+
+def test_dict_to_sqlalchemy_filter_options(benchmark):
+    benchmark(dict_to_sqlalchemy_filter_options, User, FILTERS)
+
+
+@pytest.fixture(scope="module")
+def auth_response(token):
+    return AuthResponse(access_token=token, expiration=datetime.utcnow(), refresh_token=token)
+
+
+@pytest.fixture(scope="module")
+def user_page():
+    # the shape read_by_options returns for a projected 100-row page
+    user = {"id": uuid.uuid4(), "email": "driver@test.com", "name": "driver", "phone_number": "010", "image_url": None}
+    founds = [{**user, "is_active": True, "is_superuser": False, "created_at": datetime.utcnow(), "updated_at": None}] * 100
+    return {"founds": founds, "search_options": {"page": 1, "page_size": 100, "total_count": 100}}
+
+
+def fastapi_response(response_class, field, content):
+    # what a route with response_model does to a returned value: validate, serialize to python, encode.
+    # serialize_response never suspends for a coroutine endpoint, so it is driven without an event loop
+    try:
+        serialize_response(field=field, response_content=content, is_coroutine=True).send(None)
+    except StopIteration as done:
+        return response_class(done.value)
+
+
+@pytest.mark.parametrize("response_class", [JSONResponse, ORJSONResponse], ids=["json", "orjson"])
+def test_auth_response_via_response_model(benchmark, auth_response, response_class):
+    benchmark(fastapi_response, response_class, create_response_field("response", AuthResponse), auth_response)
+
+
+def test_auth_response_via_type_adapter(benchmark, auth_response):
+    benchmark(json_response, auth_response)
+
+
+@pytest.mark.parametrize("response_class", [JSONResponse, ORJSONResponse], ids=["json", "orjson"])
+def test_user_page_via_response_model(benchmark, user_page, response_class):
+    benchmark(fastapi_response, response_class, create_response_field("response", FindResult[UserResponse]), user_page)
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# cold start of one worker: a fresh interpreter importing the app and building it, which is what every
+# worker (re)spawn and every autoscaled replica pays before it can serve
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+COLD_START = "from app.main import create_app; create_app()"
+# what importing app.main must not load; create_app() loads them, once, in the gunicorn master with preload_app
+DEFERRED_MODULES = ["jose", "passlib", "sqlmodel", "app.core.security", "app.services", "app.repository", "app.model"]
+LOADED_MODULES = f"import json, sys; import app.main; print(json.dumps([name for name in {DEFERRED_MODULES!r} if name in sys.modules]))"
+
+
+def cold_start():
+    subprocess.run([sys.executable, "-c", COLD_START], check=True, env=os.environ.copy())
+
+
+def test_cold_start(benchmark):
+    # timed here rather than read from benchmark.stats, which is empty under --benchmark-disable
+    timings = []
+
+    def timed_cold_start():
+        start = time.perf_counter()
+        cold_start()
+        timings.append(time.perf_counter() - start)
+
+    benchmark.pedantic(timed_cold_start, rounds=3, iterations=1)
+    assert min(timings) < STARTUP_BUDGET_SECONDS
+
+
+def test_importing_the_app_module_defers_the_heavy_imports():
+    output = subprocess.run([sys.executable, "-c", LOADED_MODULES], check=True, env=os.environ.copy(), capture_output=True, text=True)
+    assert json.loads(output.stdout.splitlines()[-1]) == []
@@ -0,0 +1,57 @@
+# multi-process server: `gunicorn -c gunicorn.conf.py` (the Docker image's default command).
+# Every setting can be overridden from the environment, e.g. WEB_CONCURRENCY=8.
+import gc
+import os
+
+# bcrypt and JWT work is CPU bound: one worker per core the process may run on
+cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+workers = int(os.getenv("WEB_CONCURRENCY", cores))
+# each worker hashes in its own thread pool; split the cores between them instead of giving each worker all of them
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, cores // workers)))
+os.environ.setdefault("PASSWORD_HASH_BULK_CONCURRENCY", "1")
+
+from app.core.config import configs  # noqa: E402  (reads the defaults above)
+
+wsgi_app = "app.main:create_app()"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:4001")
+# import and build the app once in the master: workers fork with the modules and the JWT key ring already loaded,
+# so a (re)spawned worker serves in milliseconds instead of paying the cold start. Nothing connects before the fork:
+# the database engines are created on first use and drop inherited connections (os.register_at_fork in
+# app.core.database), and the shared cache client connects on first use in each worker.
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+# recycle workers gracefully; the jitter keeps them from all restarting at the same moment
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", max_requests // 10))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+keepalive = int(os.getenv("KEEPALIVE", 5))
+# peers whose X-Forwarded-For/-Proto the uvicorn workers apply to request.client (see FORWARDED_* in app.core.config)
+forwarded_allow_ips = configs.FORWARDED_ALLOW_IPS
+# worker heartbeats on tmpfs: a disk-backed /tmp (overlayfs in containers) can stall them
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def on_starting(server):
+    if configs.CACHE_BACKEND == "shared":
+        from app.core.shared_cache import start_cache_server
+
+        # the key guards every cache entry and revocation; it must be set and must not double as the JWT secret
+        if not configs.SHARED_CACHE_AUTHKEY or configs.SHARED_CACHE_AUTHKEY == configs.SECRET_KEY:
+            raise RuntimeError("CACHE_BACKEND=shared needs its own SHARED_CACHE_AUTHKEY")
+        server.cache_server = start_cache_server(
+            configs.SHARED_CACHE_SOCKET, configs.SHARED_CACHE_AUTHKEY.encode(), configs.SHARED_CACHE_MAX_SIZE
+        )
+        server.log.info("shared cache listening on %s", configs.SHARED_CACHE_SOCKET)
+
+
+def when_ready(server):
+    # move everything the preloaded app allocated out of the collector's reach, so collections in the workers
+    # do not touch (and so copy) the pages they share with the master
+    gc.freeze()
+
+
+def on_exit(server):
+    cache_server = getattr(server, "cache_server", None)
+    if cache_server is not None:
+        cache_server.shutdown()
@@ -0,0 +1,51 @@
+"""refresh token hash
+
+Revision ID: 5b2f8c1d9e47
+Revises: 0d7ca50837d5
+Create Date: 2026-10-18 10:12:41.530214
+
+"""
+
+import hashlib
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b2f8c1d9e47"
+down_revision = "0d7ca50837d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("refreshtoken", sa.Column("token_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("UPDATE refreshtoken SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    elif bind.dialect.name == "mysql":
+        op.execute("UPDATE refreshtoken SET token_hash = SHA2(token, 256)")
+    else:
+        refreshtoken = sa.table("refreshtoken", sa.column("id"), sa.column("token"), sa.column("token_hash"))
+        for id, token in bind.execute(sa.select(refreshtoken.c.id, refreshtoken.c.token)).all():
+            bind.execute(refreshtoken.update().where(refreshtoken.c.id == id).values(token_hash=hashlib.sha256(token.encode()).hexdigest()))
+
+    with op.batch_alter_table("refreshtoken") as batch_op:
+        batch_op.alter_column("token_hash", existing_type=sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False)
+        batch_op.drop_column("token")
+    op.create_index(op.f("ix_refreshtoken_token_hash"), "refreshtoken", ["token_hash"], unique=True)
+    op.create_index(op.f("ix_refreshtoken_user_id"), "refreshtoken", ["user_id"], unique=False)
+
+
+def downgrade():
+    # raw tokens cannot be recovered from their digest, existing sessions are invalidated
+    op.drop_index(op.f("ix_refreshtoken_user_id"), table_name="refreshtoken")
+    op.drop_index(op.f("ix_refreshtoken_token_hash"), table_name="refreshtoken")
+    op.add_column("refreshtoken", sa.Column("token", sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.execute("UPDATE refreshtoken SET token = token_hash")
+    with op.batch_alter_table("refreshtoken") as batch_op:
+        batch_op.alter_column("token", existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+        batch_op.create_unique_constraint("refreshtoken_token_key", ["token"])
+        batch_op.drop_column("token_hash")
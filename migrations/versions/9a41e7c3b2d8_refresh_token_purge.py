@@ -0,0 +1,45 @@
+"""refresh token purge: expiration index and job lease table
+
+Revision ID: 9a41e7c3b2d8
+Revises: 5b2f8c1d9e47
+Create Date: 2026-10-18 11:03:17.204518
+
+"""
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a41e7c3b2d8"
+down_revision = "5b2f8c1d9e47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f("ix_refreshtoken_expiration"), "refreshtoken", ["expiration"], unique=False)
+    op.create_table(
+        "joblease",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("created_by", sqlmodel.sql.sqltypes.GUID(), nullable=True),
+        sa.Column("updated_by", sqlmodel.sql.sqltypes.GUID(), nullable=True),
+        sa.Column("deleted_by", sqlmodel.sql.sqltypes.GUID(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column("holder", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_index(op.f("ix_joblease_id"), "joblease", ["id"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_joblease_id"), table_name="joblease")
+    op.drop_table("joblease")
+    op.drop_index(op.f("ix_refreshtoken_expiration"), table_name="refreshtoken")
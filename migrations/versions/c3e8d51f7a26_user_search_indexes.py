@@ -0,0 +1,62 @@
+"""user search indexes
+
+Revision ID: c3e8d51f7a26
+Revises: e7b4a92c0f13
+Create Date: 2026-10-18 18:02:41.736190
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3e8d51f7a26"
+down_revision = "e7b4a92c0f13"
+branch_labels = None
+depends_on = None
+
+# one index per operator in app.util.query_builder
+POSTGRESQL_INDEXES = {
+    # email__startswith and name__startswith: prefix LIKE
+    "ix_user_email_pattern": 'ON "user" (email varchar_pattern_ops)',
+    "ix_user_name_pattern": 'ON "user" (name varchar_pattern_ops)',
+    # email__iexact: lower(email) = :value
+    "ix_user_email_lower": 'ON "user" (lower(email))',
+    # email__icontains and name__icontains: ILIKE substring
+    "ix_user_email_trgm": 'ON "user" USING gin (email gin_trgm_ops)',
+    "ix_user_name_trgm": 'ON "user" USING gin (name gin_trgm_ops)',
+    # name__search: the prefix tsquery
+    "ix_user_name_tsv": "ON \"user\" USING gin (to_tsvector('simple', coalesce(name, '')))",
+}
+
+# email__iexact only. SQLite has no trigram or tsvector indexes, and its LIKE optimization needs a NOCASE index and a
+# literal pattern, which startswith (:value || '%') and name__search (lower(name) LIKE) never give it; those filters scan
+SQLITE_INDEXES = {
+    "ix_user_email_lower": 'ON "user" (lower(email))',
+}
+
+
+# other dialects (MySQL) get no search indexes: the DDL above is not portable and these filters scan there
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # CONCURRENTLY keeps the user table writable while building; it cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, definition in POSTGRESQL_INDEXES.items():
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+    elif dialect == "sqlite":
+        for name, definition in SQLITE_INDEXES.items():
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for name in POSTGRESQL_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    elif dialect == "sqlite":
+        for name in SQLITE_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,31 @@
+"""user keyset indexes
+
+Revision ID: e7b4a92c0f13
+Revises: 9a41e7c3b2d8
+Create Date: 2026-10-18 18:45:12.318804
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e7b4a92c0f13"
+down_revision = "9a41e7c3b2d8"
+branch_labels = None
+depends_on = None
+
+# cursor pages seek on (order column, id); email is unique, so its own index already orders every row
+KEYSET_INDEXES = {
+    "ix_user_updated_at_id": ["updated_at", "id"],
+    "ix_user_created_at_id": ["created_at", "id"],
+}
+
+
+def upgrade():
+    for name, columns in KEYSET_INDEXES.items():
+        op.create_index(name, "user", columns, unique=False)
+
+
+def downgrade():
+    for name in KEYSET_INDEXES:
+        op.drop_index(name, table_name="user")
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+import app.model  # noqa: F401  registers every table, so create_database builds the full schema
+from app.core.database import AsyncDatabase, Database
+from app.repository import UserRepository
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    db = Database(f"sqlite:///{tmp_path}/test.db")
+    db.create_database()
+    return db
+
+
+@pytest.fixture
+def async_sqlite_db(tmp_path):
+    db = AsyncDatabase(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    asyncio.run(db.create_database())
+    return db
+
+
+@pytest.fixture
+def user_repository(sqlite_db):
+    return UserRepository(session_factory=sqlite_db.session)
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import DuplicatedError, NotFoundError
+from app.model.user import User
+from app.repository import AsyncUserRepository
+from app.schema.user_schema import FindUser, UpdateUser
+from app.services import UserService
+
+
+def test_async_user_repository_crud(async_sqlite_db):
+    repository = AsyncUserRepository(session_factory=async_sqlite_db.session)
+
+    async def scenario():
+        user = await repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+        assert (await repository.read_by_email("driver@test.com")).id == user.id
+
+        with pytest.raises(DuplicatedError):
+            await repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+
+        updated = await repository.update(user.id, UpdateUser(name="renamed"))
+        assert updated.name == "renamed"
+
+        found = await repository.read_by_options(FindUser(page=1, page_size=10))
+        assert found["search_options"]["total_count"] == 1
+        assert found["founds"][0].email == "driver@test.com"
+
+        await repository.delete_by_id(user.id)
+        with pytest.raises(NotFoundError):
+            await repository.read_by_id(user.id)
+
+    asyncio.run(scenario())
+
+
+def test_service_awaits_async_repository(async_sqlite_db):
+    service = UserService(user_repository=AsyncUserRepository(session_factory=async_sqlite_db.session))
+
+    async def scenario():
+        user = await service.add(User(email="admin@test.com", password="secret", name="admin"))
+        assert user.password != "secret"
+        assert (await service.get_by_id(user.id)).email == "admin@test.com"
+
+    asyncio.run(scenario())
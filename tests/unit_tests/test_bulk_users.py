@@ -0,0 +1,101 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.repository import UserRepository
+from app.schema.user_schema import FindUser
+from app.services.user_service import UserService
+from app.util.bulk_io import encode_batches, read_rows
+
+
+async def chunked(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.fixture
+def service(user_repository):
+    return UserService(user_repository=user_repository)
+
+
+def test_read_rows_across_chunk_boundaries():
+    ndjson = '\ufeff{"email": "é@x.com"}\r\n\nnot json\n[1]\n{"email": "b@x.com"}'.encode()
+    rows = asyncio.run(collect(read_rows(chunked(ndjson), "ndjson")))
+    assert rows == [
+        (1, {"email": "é@x.com"}, None),
+        (3, None, rows[1][2]),
+        (4, None, "expected a JSON object"),
+        (5, {"email": "b@x.com"}, None),
+    ]
+
+    csv = b'email,name\na@x.com,"Doe, Jane"\nb@x.com,\nc@x.com\n'
+    rows = asyncio.run(collect(read_rows(chunked(csv), "csv")))
+    assert rows == [
+        (2, {"email": "a@x.com", "name": "Doe, Jane"}, None),
+        (3, {"email": "b@x.com"}, None),
+        (4, None, "expected 2 columns, got 1"),
+    ]
+
+
+def test_encode_batches_csv_header_once():
+    async def batches():
+        yield [{"email": "a@x.com", "name": "A"}]
+        yield [{"email": "b@x.com", "name": None, "password": "ignored"}]
+
+    chunks = asyncio.run(collect(encode_batches(batches(), "csv", ["email", "name"])))
+    assert b"".join(chunks).decode().splitlines() == ["email,name", "a@x.com,A", "b@x.com,"]
+
+
+def test_import_and_export_users(service):
+    body = b"\n".join(
+        [
+            b'{"email": "a@x.com", "password": "pw", "name": "A"}',
+            b'{"email": "b@x.com", "password": "pw"}',
+            b'{"email": "a@x.com", "password": "pw"}',
+            b'{"email": "invalid", "password": "pw"}',
+            b'{"email": "c@x.com"}',
+        ]
+    )
+    report = asyncio.run(service.import_users(read_rows(chunked(body), "ndjson"), chunk_size=1))
+    assert (report.total, report.created, report.failed) == (5, 2, 3)
+    assert [(error.line, error.error) for error in report.errors][0] == (3, "duplicate email in file")
+
+    again = asyncio.run(service.import_users(read_rows(chunked(b'{"email": "b@x.com", "password": "pw"}'), "ndjson"), chunk_size=10))
+    assert (again.created, again.errors[0].error) == (0, "email already exists")
+
+    batches = asyncio.run(collect(service.export_users(batch_size=1)))
+    assert sorted(row["email"] for batch in batches for row in batch) == ["a@x.com", "b@x.com"]
+    assert all(len(batch) == 1 and "password" not in batch[0] for batch in batches)
+
+
+def test_stream_list_filters_and_orders(service):
+    body = b"\n".join(b'{"email": "%s@x.com", "password": "pw", "name": "%s"}' % (name, name) for name in [b"carol", b"alice", b"bob"])
+    asyncio.run(service.import_users(read_rows(chunked(body), "ndjson"), chunk_size=10))
+
+    schema = FindUser(name__icontains="o", order_by="name", ordering="desc")
+    stream = encode_batches(service.stream_list(schema, ["email", "created_at"], batch_size=1), "json", [])
+    rows = json.loads(b"".join(asyncio.run(collect(stream))))
+    assert [row["email"] for row in rows] == ["carol@x.com", "bob@x.com"]
+    assert "T" in rows[0]["created_at"]
+
+    empty = encode_batches(service.stream_list(FindUser(email__iexact="nobody"), ["email"], batch_size=1), "json", [])
+    assert b"".join(asyncio.run(collect(empty))) == b"[]"
+
+
+def test_bulk_insert_ignores_duplicates_on_mysql():
+    repository = UserRepository(session_factory=None)
+    rows = [{"id": uuid.uuid4(), "email": "a@x.com"}]
+
+    statement = str(repository._insert_ignore_statement("mysql", "email").compile(dialect=mysql.dialect()))
+    created = str(repository._created_statement(rows, "email").compile(dialect=mysql.dialect()))
+
+    assert statement.startswith("INSERT IGNORE INTO user ")
+    assert "RETURNING" not in statement
+    assert created.startswith("SELECT user.email") and "user.id IN" in created
@@ -0,0 +1,25 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("short", "value", ttl=0.01)
+    cache.set("long", "value")
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    assert len(cache) == 1
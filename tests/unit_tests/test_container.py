@@ -1,3 +1,5 @@
+import asyncio
+
 from app.core.exceptions import NotFoundError
 
 
@@ -5,7 +7,7 @@ from app.core.exceptions import NotFoundError
 def test_container_with_intended_exception(container):
     auth_service = container.auth_service()
     try:
-        auth_service.get_by_id(1)
+        asyncio.run(auth_service.get_by_id(1))
     except NotFoundError:
         assert True
         return
@@ -0,0 +1,89 @@
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.database import Database
+from app.core.middleware import DatabaseSessionMiddleware
+from app.core.security import PasswordHashExecutor
+from app.model.user import User
+from app.repository import UserRepository
+
+
+def test_request_scope_shares_one_connection(sqlite_db, user_repository):
+    checkouts = sqlite_db.pool_stats()["checkouts"]
+
+    async def request():
+        async with sqlite_db.request_scope():
+            user = user_repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+            assert user_repository.read_by_email("driver@test.com").id == user.id
+            assert user_repository.read_by_id(user.id).name == "driver"
+
+    asyncio.run(request())
+
+    stats = sqlite_db.pool_stats()
+    assert stats["checkouts"] - checkouts == 1
+    assert stats["checkedout"] == 0
+    assert stats["wait_count"] == 1
+    # committed work is visible outside the request scope
+    assert user_repository.read_by_email("driver@test.com") is not None
+
+
+def test_engine_is_created_on_first_use(tmp_path):
+    # builds its own Database: the conftest fixture has already created the engine
+    db = Database(f"sqlite:///{tmp_path}/test.db")
+    assert db._engine is None
+
+    db.create_database()
+    engine = db.engine
+    repository = UserRepository(session_factory=db.session)
+    repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+
+    assert db.engine is engine
+    assert repository.read_by_email("driver@test.com") is not None
+
+
+def test_reset_after_fork_replaces_the_pool(sqlite_db, user_repository):
+    pool = sqlite_db.engine.pool
+
+    sqlite_db.reset_after_fork()
+
+    assert sqlite_db.engine.pool is not pool
+    user_repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+    assert user_repository.read_by_email("driver@test.com") is not None
+
+
+def test_pending_password_hash_holds_no_connection(sqlite_db, user_repository):
+    executor = PasswordHashExecutor(max_workers=1, max_queue=0)
+
+    async def request():
+        async with sqlite_db.request_scope():
+            user_repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+            assert sqlite_db.pool_stats()["checkedout"] == 1
+            # runs while the hash is pending
+            checkedout = await executor.run(lambda: sqlite_db.pool_stats()["checkedout"])
+            assert checkedout == 0
+            assert user_repository.read_by_email("driver@test.com") is not None
+
+    asyncio.run(request())
+    assert sqlite_db.pool_stats()["checkedout"] == 0
+
+
+def test_connection_is_released_before_background_tasks(sqlite_db, user_repository):
+    seen = []
+
+    def record():
+        seen.append(sqlite_db.pool_stats()["checkedout"])
+
+    def endpoint(request):
+        user_repository.read_by_email("driver@test.com")
+        seen.append(sqlite_db.pool_stats()["checkedout"])
+        return PlainTextResponse("ok", background=BackgroundTask(record))
+
+    app = Starlette(routes=[Route("/", endpoint)], middleware=[Middleware(DatabaseSessionMiddleware, db=sqlite_db)])
+    assert TestClient(app).get("/").status_code == 200
+    assert seen == [1, 0]
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from dependency_injector import providers
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import auth
+from app.core.container import Container
+from app.core.security import create_jwt_token
+from app.model.refresh_token import RefreshToken
+from app.repository import RefreshTokenRepository
+from app.services.auth_service import AuthService
+from app.util.hash import hash_token
+
+
+@pytest.fixture
+def service(sqlite_db, user_repository):
+    return AuthService(user_repository=user_repository, refresh_token_repository=RefreshTokenRepository(session_factory=sqlite_db.session))
+
+
+def test_introspect_batch(service):
+    access, _ = create_jwt_token({"subject": str(uuid.uuid4()), "token_type": "access"})
+    expired, _ = create_jwt_token({"subject": str(uuid.uuid4()), "token_type": "access"}, timedelta(seconds=-1))
+    stored, _ = create_jwt_token({"token_type": "refresh"}, timedelta(days=1))
+    revoked, _ = create_jwt_token({"token_type": "refresh"}, timedelta(days=1))
+    service.refresh_token_repository.create(
+        RefreshToken(
+            user_id=uuid.uuid4(), token_hash=hash_token(stored), expiration=datetime.now() + timedelta(days=1), last_used=datetime.now()
+        )
+    )
+
+    results = asyncio.run(service.introspect([access, expired, stored, revoked, "not-a-token", access])).results
+
+    assert [result.active for result in results] == [True, False, True, False, False, True]
+    assert results[0].claims["token_type"] == "access"
+    assert results[3].error == "Token has been revoked"
+    assert results[1].claims is None
+
+
+def test_introspect_endpoint_requires_an_access_token(service):
+    app = FastAPI()
+    app.include_router(auth.router)
+    container = Container()
+    container.auth_service.override(providers.Object(service))
+    container.wire(modules=[auth])
+    client = TestClient(app)
+    access, _ = create_jwt_token({"subject": str(uuid.uuid4()), "token_type": "access"})
+    refresh, _ = create_jwt_token({"token_type": "refresh"}, timedelta(days=1))
+
+    assert client.post("/auth/introspect", json={"tokens": [access]}).status_code == 403
+    assert client.post("/auth/introspect", json={"tokens": [access]}, headers={"Authorization": f"Bearer {refresh}"}).status_code == 403
+    response = client.post("/auth/introspect", json={"tokens": [access]}, headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["active"] is True
+    container.unwire()
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+import rsa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose.exceptions import JWTError
+
+from app.api.well_known import router
+from app.core.keys import KeyRing, verify_with_jwks
+
+
+@pytest.fixture(scope="module")
+def pems():
+    # small keys keep the test fast; production keys come from app.scripts.generate_jwt_key
+    keys = [rsa.newkeys(1024)[1] for _ in range(2)]
+    return [key.save_pkcs1().decode() for key in keys], [rsa.PublicKey(key.n, key.e).save_pkcs1().decode() for key in keys]
+
+
+def test_tokens_carry_kid_and_verify_locally_from_jwks(pems):
+    private, _ = pems
+    ring = KeyRing("RS256", {"old": private[0], "new": private[1]}, signing_kid="new")
+    token = ring.sign({"subject": "user", "exp": time.time() + 60})
+
+    assert ring.verify(token)["subject"] == "user"
+    assert {key["kid"] for key in ring.jwks()["keys"]} == {"old", "new"}
+    assert "d" not in ring.jwks()["keys"][0]
+    assert verify_with_jwks(token, ring.jwks())["subject"] == "user"
+
+
+def test_retired_key_still_verifies_but_unknown_kid_fails(pems, tmp_path):
+    private, public = pems
+    old_token = KeyRing("RS256", {"old": private[0]}).sign({"subject": "user", "exp": time.time() + 60})
+
+    (tmp_path / "old.pub.pem").write_text(public[0])
+    (tmp_path / "new.pem").write_text(private[1])
+    ring = KeyRing.from_directory("RS256", str(tmp_path))
+
+    assert ring.signing_kid == "new"
+    assert ring.verify(old_token)["subject"] == "user"
+    os.remove(tmp_path / "old.pub.pem")
+    with pytest.raises(JWTError):
+        KeyRing.from_directory("RS256", str(tmp_path)).verify(old_token)
+
+
+def test_shared_secret_ring_publishes_nothing():
+    ring = KeyRing("HS256", secret="secret")
+    assert ring.verify(ring.sign({"subject": "user", "exp": time.time() + 60}))["subject"] == "user"
+    assert ring.jwks() == {"keys": []}
+
+
+def test_jwks_endpoint_is_cacheable():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
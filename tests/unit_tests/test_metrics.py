@@ -0,0 +1,62 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Histogram, MetricsRegistry, http_requests
+from app.core.middleware import MetricsMiddleware
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "test latency", ("operation",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, operation="verify")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{operation="verify",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{operation="verify",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{operation="verify",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{operation="verify"} 4' in lines
+
+
+def test_collected_running_totals_are_counters():
+    registry = MetricsRegistry()
+    registry.register_collector(
+        "db_pool", lambda: {"checkouts": 3, "wait_seconds_total": 0.5, "checkedout": 1}, counters=("checkouts", "wait_seconds_total")
+    )
+
+    lines = registry.render().splitlines()
+    assert lines == [
+        "# TYPE db_pool_checkouts_total counter",
+        "db_pool_checkouts_total 3",
+        "# TYPE db_pool_wait_seconds_total counter",
+        "db_pool_wait_seconds_total 0.5",
+        "# TYPE db_pool_checkedout gauge",
+        "db_pool_checkedout 1",
+    ]
+
+
+def test_timer_observes_even_when_the_block_raises():
+    histogram = Histogram("timer_seconds", "test timer")
+    try:
+        with histogram.time():
+            raise ValueError
+    except ValueError:
+        pass
+    assert histogram.count() == 1
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert http_requests.value(method="GET", route="/items/{item_id}", status=200) == 2
+    assert http_requests.value(method="GET", route="unmatched", status=404) == 1
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.core.exceptions import NotFoundError, ValidationError
+from app.model.user import User
+from app.schema.user_schema import FindUser
+
+
+@pytest.fixture
+def repository(user_repository):
+    started = datetime(2024, 1, 1)
+    for index in range(25):
+        # duplicated and missing updated_at values exercise the id tie-breaker and null handling
+        updated_at = None if index % 5 == 0 else started + timedelta(minutes=index // 2)
+        user_repository.create(User(email=f"user{index}@test.com", password="hashed", name=f"user{index}", updated_at=updated_at))
+    return user_repository
+
+
+def walk(repository, **options):
+    ids, cursor = [], None
+    while True:
+        found = repository.read_by_options(FindUser(page_size=4, cursor=cursor, **options))
+        ids += [user.id for user in found["founds"]]
+        cursor = found["search_options"]["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("ordering", ["desc", "asc"])
+def test_cursor_pages_match_offset_pages(repository, ordering):
+    everything = repository.read_by_options(FindUser(page_size=100, ordering=ordering))
+    assert everything["search_options"]["next_cursor"] is None
+
+    assert walk(repository, ordering=ordering) == [user.id for user in everything["founds"]]
+
+
+@pytest.mark.parametrize("ordering", ["desc", "asc"])
+def test_cursor_pages_match_offset_pages_of_nullable_and_projected_orders(repository, ordering):
+    offset_ids = []
+    for page in range(1, 8):
+        offset_ids += [user.id for user in repository.read_by_options(FindUser(page=page, page_size=4, ordering=ordering))["founds"]]
+    assert len(offset_ids) == 25
+    assert walk(repository, ordering=ordering) == offset_ids
+
+    created = [user.id for user in repository.read_by_options(FindUser(page_size=100, order_by="created_at", ordering=ordering))["founds"]]
+    assert walk(repository, order_by="created_at", ordering=ordering) == created
+
+    ids, cursor = [], None
+    while True:
+        found = repository.read_by_options(FindUser(page_size=4, cursor=cursor, ordering=ordering), columns=["email"])
+        ids += [row["id"] for row in found["founds"]]
+        cursor = found["search_options"]["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == offset_ids
+
+
+def test_keyset_statements_compile_for_mysql(repository):
+    cursor = repository.read_by_options(FindUser(page_size=4, order_by="created_at"))["search_options"]["next_cursor"]
+    statement = repository._find_statements(FindUser(page_size=4, order_by="created_at", cursor=cursor), dialect="mysql")[0]
+    sql = str(statement.compile(dialect=mysql.dialect()))
+    assert "(user.created_at, user.id) < (%s, %s)" in sql
+    assert "NULLS LAST" not in sql
+
+    nullable = repository._find_statements(FindUser(page=2, page_size=4), dialect="mysql")[0]
+    assert "NULLS LAST" not in str(nullable.compile(dialect=mysql.dialect()))
+
+
+def test_count_can_be_skipped(repository):
+    found = repository.read_by_options(FindUser(page_size=4, count="none"))
+    assert found["search_options"]["total_count"] is None
+    assert len(found["founds"]) == 4
+
+    assert repository.read_by_options(FindUser(page_size=4, count="estimate"))["search_options"]["total_count"] == 25
+
+
+def test_cursor_is_bound_to_its_order(repository):
+    cursor = repository.read_by_options(FindUser(page_size=4))["search_options"]["next_cursor"]
+    with pytest.raises(ValidationError):
+        repository.read_by_options(FindUser(page_size=4, cursor=cursor, order_by="created_at"))
+    with pytest.raises(ValidationError):
+        repository.read_by_options(FindUser(page_size=4, cursor="not-a-cursor"))
+
+
+def test_projected_pages_are_dicts_of_selected_columns(repository):
+    columns = ["email", "name"]
+    projected = repository.read_by_options(FindUser(page_size=4, order_by="email", ordering="asc"), columns=columns)
+    entities = repository.read_by_options(FindUser(page_size=4, order_by="email", ordering="asc"))
+
+    assert [found["email"] for found in projected["founds"]] == [user.email for user in entities["founds"]]
+    assert all("password" not in found for found in projected["founds"])
+    assert projected["search_options"]["next_cursor"] == entities["search_options"]["next_cursor"]
+
+    user = entities["founds"][0]
+    assert repository.read_columns_by_id(user.id, columns) == {"email": user.email, "name": user.name}
+    with pytest.raises(NotFoundError):
+        repository.read_columns_by_id("00000000-0000-0000-0000-000000000000", columns)
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.model.user import User
+from app.schema.user_schema import FindUser
+from app.util.query_builder import dict_to_sqlalchemy_filter_options
+
+
+@pytest.fixture
+def repository(user_repository):
+    for email, name in [("Alice@test.com", "Alice Smith"), ("bob@test.com", "Bob 100%"), ("alicia@other.com", "Alicia Keys")]:
+        user_repository.create(User(email=email, password="hashed", name=name))
+    return user_repository
+
+
+def names(repository, **filters):
+    return sorted(user.name for user in repository.read_by_options(FindUser(page_size=10, **filters))["founds"])
+
+
+def test_text_operators(repository):
+    assert names(repository, email__startswith="bob") == ["Bob 100%"]
+    assert names(repository, email__iexact="alice@TEST.com") == ["Alice Smith"]
+    assert names(repository, email__icontains="TEST.COM") == ["Alice Smith", "Bob 100%"]
+    assert names(repository, name__search="alic") == ["Alice Smith", "Alicia Keys"]
+    assert names(repository, name__search="SMI ali") == ["Alice Smith"]
+    # words must start with the search words; "lice" is inside a word, not at its start
+    assert names(repository, name__search="lice") == []
+
+
+def test_wildcards_are_matched_literally(repository):
+    assert names(repository, name__icontains="0%") == ["Bob 100%"]
+    assert names(repository, name__search="100%") == ["Bob 100%"]
+    assert names(repository, name__search="%") == []
+    assert names(repository, email__startswith="_") == []
+
+
+def test_full_text_search_compiles_to_prefix_tsquery_on_postgresql():
+    query = select(User).filter(dict_to_sqlalchemy_filter_options(User, {"name__search": "Alic smi"}))
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "to_tsvector" in str(compiled) and "@@ to_tsquery" in str(compiled)
+    assert "alic:* & smi:*" in compiled.params.values()
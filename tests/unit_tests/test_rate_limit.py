@@ -0,0 +1,83 @@
+import pytest
+from starlette.requests import Request
+
+from app.core.config import configs
+from app.core.dependencies import get_client_ip
+from app.core.exceptions import TooManyRequestsError
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    LoginRateLimiter,
+    SlidingWindowLimiter,
+)
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sliding_window_weights_the_previous_window():
+    clock = Clock(1000.0)
+    limiter = SlidingWindowLimiter(InMemoryRateLimitBackend(clock=clock), limit=4, window=10, clock=clock)
+
+    assert [limiter.hit("key") for _ in range(4)] == [None] * 4
+    assert limiter.hit("key") == pytest.approx(10 + 10 * (1 - 4 / 5))
+
+    # a quarter into the next window 75% of the previous five hits still count
+    clock.now = 1012.5
+    assert limiter.hit("key") == pytest.approx(7.5 - (4 - 1) * 10 / 5)
+    clock.now = 1016.0
+    assert limiter.hit("key") is None
+    assert limiter.hit("other") is None
+
+
+def test_login_rate_limiter_counts_email_and_ip():
+    clock = Clock()
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(clock=clock), per_email=2, per_ip=3, window=60, clock=clock)
+
+    limiter.check("Driver@test.com", "10.0.0.1")
+    limiter.check("driver@test.com", "10.0.0.1")
+    with pytest.raises(TooManyRequestsError) as exc_info:
+        limiter.check("driver@test.com", "10.0.0.2")
+    assert exc_info.value.status_code == 429 and int(exc_info.value.headers["Retry-After"]) >= 1
+
+    # the ip limit holds whatever account is tried
+    limiter.check("someone@test.com", "10.0.0.1")
+    with pytest.raises(TooManyRequestsError):
+        limiter.check("another@test.com", "10.0.0.1")
+    limiter.check("another@test.com", "10.0.0.2")
+
+
+def test_in_memory_backend_expires_and_bounds_counters():
+    clock = Clock()
+    backend = InMemoryRateLimitBackend(max_size=2, clock=clock)
+    assert backend.incr("a", ttl=5) == 1 and backend.incr("a", ttl=5) == 2
+    clock.now += 5
+    assert backend.get("a") == 0 and backend.incr("a", ttl=5) == 1
+
+    backend.incr("b", ttl=5)
+    backend.incr("c", ttl=5)
+    assert len(backend._counters) == 2 and backend.get("c") == 1
+
+
+def test_ip_limit_is_off_without_a_per_ip_limit():
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), per_email=100, per_ip=0, window=60)
+    for index in range(10):
+        limiter.check(f"user{index}@test.com", "10.0.0.1")
+
+
+def test_client_ip_from_trusted_hops(monkeypatch):
+    def request(forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "headers": headers, "client": ("10.1.0.5", 4000)})
+
+    assert get_client_ip(request("1.2.3.4")) == "10.1.0.5"
+    monkeypatch.setattr(configs, "FORWARDED_TRUSTED_HOPS", 1)
+    # the client cannot push its own entry past the one the ingress appended
+    assert get_client_ip(request("6.6.6.6, 1.2.3.4")) == "1.2.3.4"
+    assert get_client_ip(request()) is None
+    monkeypatch.setattr(configs, "FORWARDED_TRUSTED_HOPS", 2)
+    assert get_client_ip(request("6.6.6.6, 1.2.3.4, 10.1.0.9")) == "1.2.3.4"
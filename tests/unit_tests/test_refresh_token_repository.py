@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.exceptions import AuthError
+from app.model.refresh_token import RefreshToken
+from app.repository import (
+    AsyncRefreshTokenRepository,
+    JobLeaseRepository,
+    RefreshTokenRepository,
+)
+from app.repository.refresh_token_repository import _purgeable_ids_statement
+from app.services import TokenPurgeService
+from app.util.hash import hash_token
+
+
+@pytest.fixture
+def repository(sqlite_db):
+    return RefreshTokenRepository(session_factory=sqlite_db.session)
+
+
+def store(repository, token, expiration=None):
+    return repository.create(
+        RefreshToken(
+            user_id=uuid.uuid4(),
+            token_hash=hash_token(token),
+            expiration=expiration or datetime.now() + timedelta(days=1),
+            last_used=datetime.now(),
+        )
+    )
+
+
+def test_tokens_are_stored_and_rotated_by_digest(repository):
+    stored = store(repository, "old-token")
+    assert stored.token_hash == hash_token("old-token")
+    assert len(stored.token_hash) == 64
+
+    assert repository.rotate_token("old-token", "new-token") == stored.user_id
+    with pytest.raises(AuthError):
+        repository.rotate_token("old-token", "another-token")
+
+    repository.delete_session("new-token")
+
+
+def test_purge_removes_expired_tokens_in_batches(repository):
+    for index in range(5):
+        store(repository, f"expired-{index}", expiration=datetime.now() - timedelta(days=1))
+    store(repository, "alive")
+    service = TokenPurgeService(refresh_token_repository=repository, batch_size=2, interval=60)
+
+    result = asyncio.run(service.purge_expired())
+
+    assert result["purged"] == 5
+    assert service.stats()["purged_total"] == 5
+    repository.rotate_token("alive", "rotated")
+
+
+def test_purge_batches_walk_the_expiration_index(sqlite_db):
+    statement = _purgeable_ids_statement(datetime.now(), 100).compile(sqlite_db.engine, compile_kwargs={"literal_binds": True})
+    with sqlite_db.engine.connect() as connection:
+        plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}"))
+
+    assert "ix_refreshtoken_expiration" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_only_one_holder_takes_the_purge_lease(sqlite_db, repository):
+    leases = JobLeaseRepository(session_factory=sqlite_db.session)
+    first = TokenPurgeService(refresh_token_repository=repository, batch_size=2, interval=60, lease_repository=leases)
+    second = TokenPurgeService(refresh_token_repository=repository, batch_size=2, interval=60, lease_repository=leases)
+    second.holder = "other-host:1"
+
+    assert asyncio.run(first.take_lease())
+    assert not asyncio.run(second.take_lease())
+    # the holder renews its own lease on the next round
+    assert asyncio.run(first.take_lease())
+    # an expired lease is taken over by the next worker
+    assert leases.acquire(TokenPurgeService.LEASE_NAME, "other-host:1", -1) is False
+    assert leases.acquire(TokenPurgeService.LEASE_NAME, first.holder, -1)
+    assert asyncio.run(second.take_lease())
+
+
+def test_expired_token_cannot_be_rotated(repository):
+    store(repository, "expired", expiration=datetime.now() - timedelta(seconds=1))
+    with pytest.raises(AuthError):
+        repository.rotate_token("expired", "new-token")
+
+
+def test_only_one_of_parallel_rotations_wins(repository):
+    store(repository, "shared-token")
+
+    def rotate(index):
+        try:
+            repository.rotate_token("shared-token", f"new-token-{index}")
+            return True
+        except AuthError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(rotate, range(16)))
+
+    assert results.count(True) == 1
+
+
+def test_only_one_of_concurrent_async_rotations_wins(async_sqlite_db):
+    repository = AsyncRefreshTokenRepository(session_factory=async_sqlite_db.session)
+
+    async def scenario():
+        await repository.create(
+            RefreshToken(
+                user_id=uuid.uuid4(),
+                token_hash=hash_token("shared-token"),
+                expiration=datetime.now() + timedelta(days=1),
+                last_used=datetime.now(),
+            )
+        )
+        return await asyncio.gather(
+            *(repository.rotate_token("shared-token", f"new-token-{index}") for index in range(8)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert sum(not isinstance(result, Exception) for result in results) == 1
+    assert all(isinstance(result, AuthError) for result in results if isinstance(result, Exception))
@@ -0,0 +1,17 @@
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import json_response, type_adapter
+from app.schema.auth_schema import AuthResponse
+
+
+def test_json_response_matches_response_model_output():
+    response = AuthResponse(access_token="access", expiration=datetime(2024, 1, 1, 12, 30), refresh_token="refresh")
+
+    rendered = json_response(response)
+
+    assert rendered.media_type == "application/json"
+    assert json.loads(rendered.body) == jsonable_encoder(response)
+    assert type_adapter(AuthResponse) is type_adapter(AuthResponse)
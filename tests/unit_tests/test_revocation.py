@@ -0,0 +1,63 @@
+import time
+import uuid
+
+import pytest
+
+from app.core.exceptions import AuthError
+from app.core.revocation import BloomFilter, RevocationList
+from app.core.security import create_jwt_token, decode_jwt, revoke_token
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    added = [str(uuid.uuid4()) for _ in range(10_000)]
+    for key in added:
+        bloom.add(key)
+
+    assert all(key in bloom for key in added)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10_000))
+    assert false_positives < 300
+
+
+def test_entries_expire_with_their_token(monkeypatch):
+    revocations = RevocationList(capacity=100, rebuild_seconds=60)
+    revocations.revoke("short", time.time() + 60)
+    revocations.revoke("long", time.time() + 600)
+    revocations.revoke("already-expired", time.time() - 1)
+    assert revocations.is_revoked("short") and revocations.is_revoked("long")
+    assert not revocations.is_revoked("already-expired")
+
+    now = time.time() + 120
+    monkeypatch.setattr("app.core.revocation.time.time", lambda: now)
+    revocations.revoke("later", now + 60)
+    revocations._rebuild_thread.join()
+
+    assert not revocations.is_revoked("short")
+    assert revocations.is_revoked("long")
+    assert len(revocations) == 2
+
+
+def test_reads_trigger_the_rebuild_on_a_background_thread(monkeypatch):
+    revocations = RevocationList(capacity=100, rebuild_seconds=60)
+    revocations.revoke("short", time.time() + 30)
+    assert revocations._rebuild_thread is None
+
+    now = time.time() + 120
+    monkeypatch.setattr("app.core.revocation.time.time", lambda: now)
+    assert not revocations.is_revoked("short")
+
+    assert revocations._rebuild_thread.name == "revocation-rebuild"
+    revocations._rebuild_thread.join()
+    assert len(revocations) == 0
+    assert revocations._pending is None
+
+
+def test_revoked_access_token_is_rejected():
+    token, _ = create_jwt_token({"subject": str(uuid.uuid4()), "token_type": "access"})
+    assert decode_jwt(token, validate_token=True)
+
+    assert revoke_token(token)
+    with pytest.raises(AuthError):
+        decode_jwt(token, validate_token=True)
+    with pytest.raises(AuthError):
+        decode_jwt(token, validate_token=False)
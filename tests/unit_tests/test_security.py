@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.exceptions import ServiceUnavailableError
+from app.core.security import (
+    PasswordHashExecutor,
+    calibrate_bcrypt_rounds,
+    create_jwt_token,
+    get_password_hash,
+    verified_token_cache,
+    verify_jwt_claims,
+    verify_password_async,
+)
+from app.model.user import User
+from app.repository import RefreshTokenRepository
+from app.schema.auth_schema import SignIn
+from app.services.auth_service import AuthService
+
+
+def test_verify_password_async():
+    hashed = get_password_hash("secret")
+    assert asyncio.run(verify_password_async("secret", hashed))
+    assert not asyncio.run(verify_password_async("wrong", hashed))
+
+
+def test_password_hash_executor_rejects_when_saturated():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await executor.run(release.wait)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        release.set()
+        await asyncio.gather(*running)
+        assert await executor.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_verified_claims_are_cached_until_expiry():
+    token, _ = create_jwt_token({"subject": "user-id", "token_type": "access"})
+    hits = verified_token_cache.hits
+
+    first = verify_jwt_claims(token)
+    second = verify_jwt_claims(token)
+
+    assert first == second
+    assert first["subject"] == "user-id"
+    assert verified_token_cache.hits == hits + 1
+
+
+def test_calibrate_bcrypt_rounds_stays_within_target():
+    rounds, timings = calibrate_bcrypt_rounds(target_ms=10_000, min_rounds=4, max_rounds=5, samples=1)
+    assert rounds == 5 and set(timings) == {4, 5}
+
+    rounds, timings = calibrate_bcrypt_rounds(target_ms=0, min_rounds=4, max_rounds=6, samples=1)
+    assert rounds == 4 and set(timings) == {4}
+
+
+def test_sign_in_rehashes_password_with_the_configured_cost(sqlite_db, user_repository, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+    service = AuthService(
+        user_repository=user_repository, refresh_token_repository=RefreshTokenRepository(session_factory=sqlite_db.session)
+    )
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    user = service.user_repository.create(User(email="driver@test.com", password=old_hash, name="driver"))
+
+    asyncio.run(service.sign_in(SignIn(email="driver@test.com", password="secret")))
+
+    new_hash = service.user_repository.read_by_id(user.id).password
+    assert new_hash.startswith("$2b$05$") and security.pwd_context.verify("secret", new_hash)
+    # a hash that changed in the meantime is left alone
+    assert not asyncio.run(service.rehash_password(user.id, old_hash, "secret"))
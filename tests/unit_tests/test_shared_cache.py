@@ -0,0 +1,113 @@
+import socket
+import time
+
+import pytest
+
+from app.core.cache import InMemoryCacheBackend, NamespacedCache
+from app.core.exceptions import TooManyRequestsError
+from app.core.rate_limit import LoginRateLimiter
+from app.core.revocation import RevocationList
+from app.core.shared_cache import (
+    SharedCacheBackend,
+    SharedCacheClient,
+    SharedRateLimitBackend,
+    SharedStore,
+    start_cache_server,
+)
+
+
+def test_store_log_returns_only_newer_live_entries():
+    store = SharedStore(max_size=100)
+    store.publish("revocations", "a", ttl=60)
+    cursor, items = store.updates("revocations", 0)
+    assert items == ["a"]
+
+    store.publish("revocations", "b", ttl=60)
+    store.publish("revocations", "expired", ttl=-1)
+    cursor, items = store.updates("revocations", cursor)
+    assert items == ["b"]
+    assert store.updates("revocations", cursor) == (cursor, [])
+    # a cursor from before a server restart starts over
+    assert store.updates("revocations", cursor + 100)[1] == ["a", "b"]
+
+
+def test_revocations_reach_every_worker():
+    store = SharedStore(max_size=100)
+    workers = [RevocationList(capacity=100, backend=store, sync_seconds=0) for _ in range(2)]
+    workers[0].revoke("jti", time.time() + 60)
+
+    # the first read starts the pull on a background thread instead of waiting for the server
+    workers[1].is_revoked("jti")
+    workers[1]._sync_thread.join()
+    assert workers[1].is_revoked("jti")
+    assert not workers[1].is_revoked("other")
+
+
+def test_namespaced_cache_keeps_ttl_cache_interface():
+    cache = NamespacedCache(InMemoryCacheBackend(), namespace="grace", ttl=10)
+    cache.set("token", {"access_token": "a"})
+
+    assert cache.get("token") == {"access_token": "a"}
+    assert cache.backend.get("grace:token") == {"access_token": "a"}
+    assert cache.get("missing", "default") == "default"
+    cache.delete("token")
+    assert cache.get("token") is None
+
+
+def test_workers_share_state_through_the_cache_server(tmp_path):
+    address = str(tmp_path / "cache" / "cache.sock")
+    manager = start_cache_server(address, b"secret", max_size=100)
+    try:
+        first, second = SharedCacheClient(address, b"secret"), SharedCacheClient(address, b"secret")
+        SharedCacheBackend(first).set("user:1", {"name": "driver"}, ttl=60)
+        assert SharedCacheBackend(second).get("user:1") == {"name": "driver"}
+
+        limiters = [LoginRateLimiter(SharedRateLimitBackend(client), per_email=2, per_ip=100, window=60) for client in (first, second)]
+        limiters[0].check("driver@test.com")
+        limiters[1].check("driver@test.com")
+        with pytest.raises(TooManyRequestsError):
+            limiters[0].check("driver@test.com")
+        assert SharedRateLimitBackend(first).incr("login:other", ttl=60) == 1
+        # a call the server rejects is a miss, and the connection stays usable
+        assert first.call("_values", default="missing") == "missing"
+        assert SharedCacheBackend(first).get("user:1") == {"name": "driver"}
+        # a worker with the wrong key is refused, not served
+        assert SharedCacheBackend(SharedCacheClient(address, b"wrong")).get("user:1") is None
+    finally:
+        manager.shutdown()
+
+
+def test_unreachable_server_degrades_to_misses(tmp_path):
+    client = SharedCacheClient(str(tmp_path / "missing.sock"), b"secret")
+
+    assert SharedCacheBackend(client).get("user:1") is None
+    assert SharedCacheBackend(client).updates("revocations", 5) == (5, [])
+    assert SharedRateLimitBackend(client).incr("login:ip:1.2.3.4", ttl=60) == 0
+
+
+def test_cache_server_requires_a_key_and_a_private_directory(tmp_path):
+    with pytest.raises(ValueError):
+        start_cache_server(str(tmp_path / "cache" / "cache.sock"), b"", max_size=100)
+    with pytest.raises(ValueError):
+        SharedCacheClient(str(tmp_path / "cache" / "cache.sock"), b"")
+
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+    with pytest.raises(PermissionError):
+        start_cache_server(str(shared / "cache.sock"), b"secret", max_size=100)
+
+
+def test_hung_server_costs_one_timeout_then_is_skipped(tmp_path):
+    address = str(tmp_path / "hung.sock")
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(address)
+    listener.listen()
+    try:
+        client = SharedCacheClient(address, b"secret", timeout=0.05, retry_seconds=60)
+        started = time.monotonic()
+        assert SharedCacheBackend(client).get("user:1") is None
+        assert SharedCacheBackend(client).get("user:1") is None
+        assert time.monotonic() - started < 0.5
+    finally:
+        listener.close()
@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.exceptions import AuthError
+from app.core.single_flight import SingleFlight
+from app.model.refresh_token import RefreshToken
+from app.repository import AsyncRefreshTokenRepository, AsyncUserRepository
+from app.services.auth_service import AuthService
+from app.util.hash import hash_token
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = []
+
+    async def work(value):
+        started.append(value)
+        await asyncio.sleep(0.01)
+        if value == "boom":
+            raise ValueError(value)
+        return value
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", work, "result") for _ in range(5)))
+        errors = await asyncio.gather(*(flight.do("other", work, "boom") for _ in range(3)), return_exceptions=True)
+        again = await flight.do("key", work, "again")
+        return results, errors, again
+
+    results, errors, again = asyncio.run(scenario())
+
+    assert results == ["result"] * 5 and again == "again"
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert started == ["result", "boom", "again"]
+    assert flight.stats() == {"in_flight": 0, "calls": 3, "shared": 6}
+
+
+def test_parallel_refreshes_rotate_once_and_share_the_result(async_sqlite_db):
+    async def scenario():
+        service = AuthService(
+            user_repository=AsyncUserRepository(session_factory=async_sqlite_db.session),
+            refresh_token_repository=AsyncRefreshTokenRepository(session_factory=async_sqlite_db.session),
+        )
+        await service.refresh_token_repository.create(
+            RefreshToken(
+                user_id=uuid.uuid4(),
+                token_hash=hash_token("old-token"),
+                expiration=datetime.now() + timedelta(days=1),
+                last_used=datetime.now(),
+            )
+        )
+        parallel = await asyncio.gather(*(service.refresh_token("old-token") for _ in range(5)))
+        retried = await service.refresh_token("old-token")
+        service.refresh_grace_cache.clear()
+        with pytest.raises(AuthError):
+            await service.refresh_token("old-token")
+        return parallel, retried, service.single_flight.stats()
+
+    parallel, retried, stats = asyncio.run(scenario())
+
+    assert len({response.refresh_token for response in parallel}) == 1
+    assert retried == parallel[0]
+    assert stats["calls"] == 2 and stats["shared"] == 4
+
+
+def test_flight_opens_its_own_session_inside_a_request_scope(async_sqlite_db):
+    async def scenario():
+        async def current_session():
+            async with async_sqlite_db.session() as session:
+                return session
+
+        async with async_sqlite_db.request_scope():
+            request_session = await current_session()
+            flight_session = await SingleFlight().do("key", current_session)
+            assert await current_session() is request_session
+        return request_session, flight_session
+
+    request_session, flight_session = asyncio.run(scenario())
+
+    assert flight_session is not request_session
@@ -0,0 +1,52 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.middleware import DatabaseSessionMiddleware, TracingMiddleware
+from app.core.tracing import current_trace
+
+
+def make_client(db):
+    app = FastAPI()
+    app.add_middleware(DatabaseSessionMiddleware, db=db)
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/queries")
+    def queries():
+        # sync endpoints run in the threadpool, like sync repositories
+        with db.session() as session:
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+        trace = current_trace()
+        return {"request_id": trace.request_id, "queries": trace.queries}
+
+    return TestClient(app)
+
+
+def capture(monkeypatch, sample_rate):
+    monkeypatch.setattr("app.core.tracing.configs.TRACE_SAMPLE_RATE", sample_rate)
+    records = []
+    handler = logger.add(lambda message: records.append(message.record), level="INFO")
+    return records, handler
+
+
+def test_request_id_is_propagated_and_queries_are_counted(sqlite_db, monkeypatch):
+    records, handler = capture(monkeypatch, 1.0)
+    response = make_client(sqlite_db).get("/queries", headers={"X-Request-ID": "abc123"})
+    logger.remove(handler)
+
+    assert response.headers["x-request-id"] == "abc123"
+    assert response.json() == {"request_id": "abc123", "queries": 2}
+    summary = [record for record in records if record["extra"].get("path") == "/queries"]
+    assert summary[0]["extra"]["queries"] == 2
+    assert summary[0]["extra"]["request_id"] == "abc123"
+
+
+def test_unsampled_fast_requests_are_not_logged(sqlite_db, monkeypatch):
+    records, handler = capture(monkeypatch, 0.0)
+    response = make_client(sqlite_db).get("/queries")
+    logger.remove(handler)
+
+    assert len(response.headers["x-request-id"]) == 32
+    assert not [record for record in records if record["extra"].get("path") == "/queries"]
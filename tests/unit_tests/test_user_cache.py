@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from app.core.cache import InMemoryCacheBackend, ModelCache
+from app.model.user import User
+from app.repository import AsyncUserRepository, UserRepository
+from app.schema.user_schema import UpdateUser
+
+
+def cached_repository(db, backend=None):
+    cache = ModelCache(User, max_size=100, ttl=60, backend=backend)
+    return UserRepository(session_factory=db.session, cache=cache)
+
+
+def test_read_by_id_is_served_from_cache(sqlite_db):
+    db, repository = sqlite_db, cached_repository(sqlite_db)
+    user = repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+    checkouts = db.pool_stats()["checkouts"]
+
+    assert repository.read_by_id(user.id).email == "driver@test.com"
+    assert repository.read_by_id(str(user.id)).email == "driver@test.com"
+
+    assert db.pool_stats()["checkouts"] - checkouts == 1
+    assert repository.cache.local.hits == 1
+
+
+def test_writes_invalidate_cached_user(sqlite_db):
+    repository = cached_repository(sqlite_db)
+    user = repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+    repository.read_by_id(user.id)
+
+    assert repository.update(user.id, UpdateUser(name="renamed")).name == "renamed"
+    assert repository.read_by_id(user.id).name == "renamed"
+
+    assert repository.update_attr(user.id, "is_active", False).is_active is False
+    assert repository.read_by_id(user.id).is_active is False
+
+    repository.soft_delete_by_id(user.id)
+    assert repository.cache.get(user.id) is None
+
+
+def test_shared_backend_is_consulted_on_local_miss(sqlite_db):
+    backend = InMemoryCacheBackend()
+    repository = cached_repository(sqlite_db, backend=backend)
+    user = repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+    repository.read_by_id(user.id)
+
+    other_process_cache = ModelCache(User, max_size=100, ttl=60, backend=backend)
+    cached = other_process_cache.get(user.id)
+    assert cached.id == user.id
+    assert cached.email == "driver@test.com"
+
+
+def test_read_columns_by_id_uses_cached_data(sqlite_db):
+    db, repository = sqlite_db, cached_repository(sqlite_db)
+    user = repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+    assert repository.read_columns_by_id(user.id, ["email", "is_active"]) == {"email": "driver@test.com", "is_active": True}
+    checkouts = db.pool_stats()["checkouts"]
+
+    assert repository.read_columns_by_id(str(user.id), ["name"]) == {"name": "driver"}
+    assert db.pool_stats()["checkouts"] == checkouts
+
+
+def test_async_repository_reaches_the_shared_backend_off_the_event_loop(async_sqlite_db):
+    threads = []
+
+    class RecordingBackend(InMemoryCacheBackend):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+    cache = ModelCache(User, max_size=100, ttl=60, backend=RecordingBackend())
+    repository = AsyncUserRepository(session_factory=async_sqlite_db.session, cache=cache)
+
+    async def scenario():
+        user = await repository.create(User(email="driver@test.com", password="hashed", name="driver"))
+        return await repository.read_by_id(user.id)
+
+    assert asyncio.run(scenario()).email == "driver@test.com"
+    assert threads and threading.main_thread() not in threads